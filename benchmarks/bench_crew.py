@@ -0,0 +1,476 @@
+#!/usr/bin/env python
+# benchmarks/bench_crew.py
+"""End-to-end benchmark of ResearchCrew without Ollama or network access
+
+The crew talks to a local fake OpenAI-compatible endpoint that answers with
+deterministic canned responses after a configurable latency. The head of
+research is scripted to search (stub Serper backend) and then read a page
+served by the same local server, so the search and scrape tools run too.
+
+Measured: crew construction time, per-task latency and orchestration
+overhead of a single run, throughput at N concurrent runs and peak memory.
+Results are written as JSON; --compare checks them against an earlier file.
+
+    python benchmarks/bench_crew.py --output bench.json
+    python benchmarks/bench_crew.py --latency 0.2 --concurrency 1,4,8 --compare bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+SEARCH_TOOL = "Search the internet with Serper"
+SCRAPE_TOOL = "Read website content"
+
+# Start of the extract_financials description, which is answered with statements JSON
+EXTRACTION_PROMPT = "Extract the reported financial statement figures"
+
+# Metrics compared by --compare: (path in the results, higher is better)
+COMPARED: List[Tuple[str, bool]] = [
+    ("construction.mean_ms", False),
+    ("single_run.run_seconds", False),
+    ("single_run.overhead_seconds", False),
+    ("memory.peak_traced_mb", False),
+]
+
+
+def canned_statements(prompt: str) -> str:
+    """Deterministic FinancialStatements JSON for the extraction task"""
+    rng = random.Random(sum(map(ord, prompt[:2000])))
+    company = re.search(r"BenchCo \d+", prompt)
+    revenue = rng.randint(50, 500) * 100.0
+    periods = []
+    for year in (2023, 2024):
+        revenue *= 1 + rng.randint(-5, 20) / 100
+        periods.append({
+            "period": f"FY{year}",
+            "revenue": round(revenue, 1),
+            "cost_of_revenue": round(revenue * rng.uniform(0.4, 0.7), 1),
+            "operating_income": round(revenue * rng.uniform(0.1, 0.3), 1),
+            "net_income": round(revenue * rng.uniform(0.05, 0.2), 1),
+            "total_equity": round(revenue * rng.uniform(0.5, 1.5), 1),
+            "total_debt": round(revenue * rng.uniform(0.1, 0.8), 1),
+        })
+    statements = {
+        "company": company.group(0) if company else "BenchCo",
+        "sector": "Technology",
+        "currency": "USD",
+        "unit": "millions",
+        "periods": periods,
+    }
+    return "Thought: I now know the final answer\nFinal Answer: " + json.dumps(statements)
+
+
+def canned_answer(prompt: str, words: int) -> str:
+    """Deterministic final answer sized to roughly `words` words"""
+    seed = sum(map(ord, prompt[:2000]))
+    rng = random.Random(seed)
+    sentences = []
+    while sum(len(s.split()) for s in sentences) < words:
+        figure = rng.randint(1, 99)
+        sentences.append(
+            f"Revenue grew {figure}% year over year to ${figure * 3}.{figure % 10} billion, "
+            f"with operating margin at {rng.randint(10, 45)}%."
+        )
+    return "Thought: I now know the final answer\nFinal Answer: ## Findings\n\n" + "\n".join(
+        f"- {sentence}" for sentence in sentences
+    )
+
+
+class FakeLLMServer:
+    """OpenAI-compatible /v1/chat/completions endpoint plus static pages for the scrape tool"""
+
+    def __init__(self, latency: float, jitter: float, words: int, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.words = words
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.port = self._server.server_address[1]
+        self.base_url = f"http://127.0.0.1:{self.port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="fake-llm").start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+
+    def page_url(self, company: str) -> str:
+        return f"http://127.0.0.1:{self.port}/page/{re.sub(r'[^a-z0-9]+', '-', company.lower())}"
+
+    def respond(self, messages: List[Dict[str, Any]]) -> str:
+        """Scripted reply: tool-using agents search, then scrape, then answer"""
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        observations = sum(
+            "Observation:" in str(m.get("content", "")) for m in messages if m.get("role") == "assistant"
+        )
+        if SEARCH_TOOL in prompt and observations == 0:
+            company = re.search(r"BenchCo \d+", prompt)
+            query = f"{company.group(0) if company else 'company'} annual revenue"
+            return (f"Thought: I should search first\nAction: {SEARCH_TOOL}\n"
+                    f"Action Input: {json.dumps({'search_query': query})}")
+        if SCRAPE_TOOL in prompt and observations == 1:
+            url = re.search(r"http://127\.0\.0\.1:\d+/page/[a-z0-9-]+", prompt)
+            if url:
+                return (f"Thought: I should read the top result\nAction: {SCRAPE_TOOL}\n"
+                        f"Action Input: {json.dumps({'website_url': url.group(0)})}")
+        if EXTRACTION_PROMPT in prompt:
+            return canned_statements(prompt)
+        return canned_answer(prompt, self.words)
+
+    def _delay(self) -> float:
+        with self._lock:
+            self.calls += 1
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._send(404, {"error": {"message": "not found"}})
+                    return
+                time.sleep(server._delay())
+                messages = body.get("messages", [])
+                content = server.respond(messages)
+                prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+                completion_tokens = len(content) // 4
+                self._send(200, {
+                    "id": f"chatcmpl-bench-{server.calls}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "bench"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                })
+
+            def do_GET(self):
+                if not self.path.startswith("/page/"):
+                    self.send_error(404)
+                    return
+                name = self.path.rsplit("/", 1)[1]
+                html = (f"<html><body><h1>{name}</h1>"
+                        + "".join(f"<p>{name} segment {i} revenue rose {i * 3}% in 2024.</p>" for i in range(40))
+                        + "</body></html>").encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(html)))
+                self.send_header("ETag", f'"{name}"')
+                self.end_headers()
+                self.wfile.write(html)
+
+            def _send(self, status: int, payload: Dict[str, Any]) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class StubSearch:
+    """Serper stand-in returning canned organic results that link to the fake server"""
+
+    def __init__(self, server: FakeLLMServer, latency: float):
+        self.server = server
+        self.latency = latency
+
+    def run(self, search_query: str) -> Dict[str, Any]:
+        time.sleep(self.latency)
+        company = re.search(r"BenchCo \d+", search_query)
+        name = company.group(0) if company else search_query
+        return {
+            "searchParameters": {"q": search_query},
+            "organic": [
+                {"title": f"{name} annual report", "link": self.server.page_url(name),
+                 "snippet": f"{name} reported record revenue.", "position": 1},
+            ],
+        }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool):
+    """Silence crewai's verbose console output unless asked for"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+class Bench:
+    def __init__(self, args, server: FakeLLMServer):
+        from llm import create_llm
+
+        self.args = args
+        self.server = server
+        self.search = StubSearch(server, args.tool_latency)
+        self.llm = create_llm("openai", "bench-model", api_key="bench", base_url=server.base_url)
+        self._runs = 0
+        self._lock = threading.Lock()
+
+    def _next_company(self) -> Tuple[str, str]:
+        with self._lock:
+            self._runs += 1
+            return f"BenchCo {self._runs}", f"runs/{self._runs}"
+
+    def build(self, output_dir: str):
+        from crew import ResearchCrew
+
+        research_crew = ResearchCrew(
+            llm_instance=self.llm,
+            parallel=self.args.parallel_tasks,
+            output_dir=output_dir,
+            search_backend=self.search,
+            compact_context=self.args.compact_context,
+        )
+        return research_crew, research_crew.crew()
+
+    def run_once(self) -> Dict[str, Any]:
+        """One kickoff; returns its wall time and the run's metrics.json content"""
+        company, output_dir = self._next_company()
+        os.makedirs(output_dir, exist_ok=True)
+        start = time.perf_counter()
+        research_crew, crew = self.build(output_dir)
+        try:
+            crew.kickoff(inputs={"company": company, "current_date": "2025-01-01"})
+        finally:
+            metrics = research_crew.write_metrics()
+        return {"seconds": time.perf_counter() - start, "metrics": metrics}
+
+    def construction(self) -> Dict[str, Any]:
+        timings = []
+        for i in range(self.args.construction_iterations):
+            start = time.perf_counter()
+            self.build(f"runs/construct-{i}")
+            timings.append((time.perf_counter() - start) * 1000)
+        return {
+            "iterations": len(timings),
+            "mean_ms": round(statistics.mean(timings), 2),
+            "p95_ms": round(percentile(timings, 0.95), 2),
+        }
+
+    def single_run(self) -> Dict[str, Any]:
+        run = self.run_once()
+        metrics = run["metrics"]
+        tasks = {}
+        for name, task in metrics["tasks"].items():
+            if "wall_seconds" not in task:
+                continue
+            busy = task["llm_seconds"] + task["tool_seconds"]
+            tasks[name] = {
+                "wall_seconds": task["wall_seconds"],
+                "llm_calls": task["llm_calls"],
+                "llm_seconds": task["llm_seconds"],
+                "tool_calls": task["tool_calls"],
+                "tool_seconds": task["tool_seconds"],
+                "overhead_seconds": round(max(task["wall_seconds"] - busy, 0.0), 3),
+            }
+        return {
+            "run_seconds": round(run["seconds"], 3),
+            "overhead_seconds": round(sum(t["overhead_seconds"] for t in tasks.values()), 3),
+            "llm_calls": sum(t["llm_calls"] for t in tasks.values()),
+            "tool_calls": sum(t["tool_calls"] for t in tasks.values()),
+            "tasks": tasks,
+        }
+
+    def concurrent(self, runs: int) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=runs) as pool:
+            results = list(pool.map(lambda _: self.run_once(), range(runs)))
+        wall = time.perf_counter() - start
+        seconds = [r["seconds"] for r in results]
+        return {
+            "runs": runs,
+            "wall_seconds": round(wall, 3),
+            "runs_per_minute": round(runs / wall * 60, 2),
+            "mean_run_seconds": round(statistics.mean(seconds), 3),
+            "p95_run_seconds": round(percentile(seconds, 0.95), 3),
+            "max_rss_mb": round(max_rss_mb(), 1),
+        }
+
+    def traced_run(self) -> Dict[str, Any]:
+        tracemalloc.start()
+        try:
+            self.run_once()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return {"peak_traced_mb": round(peak / 2**20, 2), "max_rss_mb": round(max_rss_mb(), 1)}
+
+
+def max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 1024
+
+
+def lookup(results: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = results
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> bool:
+    """Print relative changes against a baseline; False if anything regressed beyond tolerance"""
+    checks = list(COMPARED)
+    levels = {c["runs"] for c in baseline.get("concurrency", [])} & {c["runs"] for c in current.get("concurrency", [])}
+    for runs in sorted(levels):
+        checks.append((f"concurrency.{runs}.runs_per_minute", True))
+
+    def value_of(results, path):
+        if path.startswith("concurrency."):
+            _, runs, key = path.split(".")
+            level = next(c for c in results["concurrency"] if c["runs"] == int(runs))
+            return level[key]
+        return lookup(results, path)
+
+    ok = True
+    print(f"\n{'metric':<36} {'baseline':>10} {'current':>10} {'change':>8}")
+    for path, higher_is_better in checks:
+        before, after = value_of(baseline, path), value_of(current, path)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        regressed = (-change if higher_is_better else change) > tolerance
+        ok = ok and not regressed
+        print(f"{path:<36} {before:>10.3f} {after:>10.3f} {change:>+7.1%}{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ResearchCrew against a local fake LLM and stub tools")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter on the LLM latency")
+    parser.add_argument("--tool-latency", type=float, default=0.02, help="Seconds per stub search")
+    parser.add_argument("--words", type=int, default=250, help="Approximate words per canned answer")
+    parser.add_argument("--concurrency", default="1,4", help="Comma-separated numbers of concurrent runs")
+    parser.add_argument("--construction-iterations", type=int, default=20)
+    parser.add_argument("--parallel-tasks", action="store_true", help="Use the parallel task graph")
+    parser.add_argument("--compact-context", action="store_true", help="Enable context compaction")
+    parser.add_argument("--output", metavar="FILE", help="Write results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="Baseline results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--verbose", action="store_true", help="Show crewai's console output")
+    args = parser.parse_args(argv)
+    levels = [int(n) for n in args.concurrency.split(",") if n.strip()]
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    # Everything the crew writes (outputs, caches) goes to a throwaway directory
+    workdir = tempfile.mkdtemp(prefix="bench-crew-")
+    os.environ["RESEARCH_CACHE_DIR"] = os.path.join(workdir, ".cache")
+    os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    sys.path.insert(0, str(SRC_DIR))
+    os.chdir(workdir)
+
+    server = FakeLLMServer(args.latency, args.jitter, args.words).start()
+    try:
+        import_start = time.perf_counter()
+        with quiet(not args.verbose):
+            import crew  # noqa: F401
+        import_seconds = time.perf_counter() - import_start
+
+        bench = Bench(args, server)
+        with quiet(not args.verbose):
+            bench.run_once()  # warm-up: lazy imports, connection setup
+            construction = bench.construction()
+            single = bench.single_run()
+            concurrency = [bench.concurrent(n) for n in levels]
+            memory = bench.traced_run()
+    finally:
+        server.stop()
+
+    import crewai
+
+    results = {
+        "config": {
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "tool_latency": args.tool_latency,
+            "words": args.words,
+            "parallel_tasks": args.parallel_tasks,
+            "compact_context": args.compact_context,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "crewai": crewai.__version__,
+        },
+        "import_seconds": round(import_seconds, 3),
+        "construction": construction,
+        "single_run": single,
+        "concurrency": concurrency,
+        "memory": memory,
+        "fake_llm_calls": server.calls,
+    }
+
+    print(f"crew import      {results['import_seconds']:.2f}s")
+    print(f"construction     {construction['mean_ms']:.1f} ms mean, {construction['p95_ms']:.1f} ms p95")
+    print(f"single run       {single['run_seconds']:.2f}s, {single['llm_calls']} LLM calls, "
+          f"{single['tool_calls']} tool calls, {single['overhead_seconds']:.2f}s orchestration overhead")
+    for name, task in single["tasks"].items():
+        print(f"  {name:<28} {task['wall_seconds']:>7.3f}s  overhead {task['overhead_seconds']:.3f}s")
+    for level in concurrency:
+        print(f"{level['runs']:>3} concurrent   {level['runs_per_minute']:.1f} runs/min, "
+              f"{level['mean_run_seconds']:.2f}s mean, {level['p95_run_seconds']:.2f}s p95")
+    print(f"memory           {memory['peak_traced_mb']:.1f} MB traced peak per run, {memory['max_rss_mb']:.0f} MB max RSS")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        return 0 if compare(results, baseline, args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
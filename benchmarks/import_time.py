@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# benchmarks/import_time.py
+"""Cold-start import time of the Streamlit app and the CLI
+
+Each target is imported in a fresh interpreter under `python -X importtime`,
+several times, and the median cumulative import time is compared against a
+budget. Targets must also keep their heavy dependencies deferred: importing
+the app or the CLI must not load crewai or litellm before a run starts.
+
+    python benchmarks/import_time.py --output import_time.json
+    python benchmarks/import_time.py --budget app=1.0 --repeat 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# name -> (module imported, budget in seconds)
+TARGETS: Dict[str, Tuple[str, float]] = {
+    "app": ("app", 1.5),
+    "cli": ("main", 0.5),
+    "crew": ("crew", 15.0),
+}
+
+# Modules that must stay out of a target's startup path
+DEFERRED: Dict[str, List[str]] = {
+    "app": ["crewai", "crewai_tools", "litellm"],
+    "cli": ["crewai", "crewai_tools", "litellm"],
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """(module, depth, self µs, cumulative µs) for every line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    """Import a module in a fresh interpreter and return its import timings"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def bench_target(name: str, module: str, budget: float, repeat: int, top: int) -> Dict:
+    """Median cold import time of one target, its heaviest imports and budget checks"""
+    runs = []
+    for _ in range(repeat):
+        rows = measure(module)
+        total = next(cumulative for mod, depth, _, cumulative in rows if mod == module and depth == 0)
+        runs.append((total, rows))
+    runs.sort(key=lambda run: run[0])
+    median_us, rows = runs[len(runs) // 2]
+
+    loaded = {mod for mod, _, _, _ in rows}
+    leaked = [mod for mod in DEFERRED.get(name, []) if mod in loaded]
+    heaviest = sorted(
+        (row for row in rows if row[1] <= 1 and row[0] != module),
+        key=lambda row: row[3],
+        reverse=True,
+    )[:top]
+
+    seconds = median_us / 1e6
+    return {
+        "module": module,
+        "median_s": round(seconds, 4),
+        "min_s": round(runs[0][0] / 1e6, 4),
+        "max_s": round(runs[-1][0] / 1e6, 4),
+        "stdev_s": round(statistics.pstdev(run[0] for run in runs) / 1e6, 4),
+        "budget_s": budget,
+        "modules_loaded": len(loaded),
+        "heaviest": [{"module": mod, "cumulative_s": round(cum / 1e6, 4)} for mod, _, _, cum in heaviest],
+        "deferred_but_loaded": leaked,
+        "ok": seconds <= budget and not leaked,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold-start import time against budgets")
+    parser.add_argument("targets", nargs="*", metavar="TARGET",
+                        help=f"Targets to measure: {', '.join(TARGETS)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list per target")
+    parser.add_argument("--budget", action="append", default=[], metavar="TARGET=SECONDS",
+                        help="Override a target's budget")
+    parser.add_argument("--output", metavar="FILE", help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.targets if name not in TARGETS]
+    if unknown:
+        parser.error(f"unknown target: {', '.join(unknown)}")
+
+    budgets = {name: budget for name, (_, budget) in TARGETS.items()}
+    for override in args.budget:
+        name, seconds = override.split("=", 1)
+        budgets[name] = float(seconds)
+
+    results = {}
+    for name in args.targets or TARGETS:
+        module = TARGETS[name][0]
+        result = bench_target(name, module, budgets[name], max(1, args.repeat), args.top)
+        results[name] = result
+        status = "ok" if result["ok"] else "OVER BUDGET"
+        print(f"{name:<5} import {module:<6} {result['median_s']:.3f}s median "
+              f"(budget {result['budget_s']:.2f}s) {status}")
+        if result["deferred_but_loaded"]:
+            print(f"      loaded at startup: {', '.join(result['deferred_but_loaded'])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return 0 if all(result["ok"] for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# src/api.py
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from jobs import Job, JobManager, QueueFull
+from limits import PRIORITIES
+from telemetry import REGISTRY
+
+_ = load_dotenv(override=True)
+
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", 8000))
+
+# Runs executing at once, and runs allowed to wait for a worker before
+# submissions are turned away with 429
+API_WORKERS = int(os.getenv("RESEARCH_WORKERS", 2))
+API_QUEUE_SIZE = int(os.getenv("API_QUEUE_SIZE", 100))
+
+# How often an event stream checks its job for news
+EVENTS_POLL_SECONDS = float(os.getenv("API_EVENTS_POLL_SECONDS", 0.5))
+
+PROVIDERS = ("ollama", "openai", "anthropic", "groq")
+OPTIONS = ("parallel", "llm_cache", "compact_context", "resume", "retrieval", "routing")
+TEXT_FIELDS = ("company", "provider", "model", "priority", "hedge")
+
+
+def provider_api_key(provider: str) -> Optional[str]:
+    """API key of a cloud provider from the environment; requests never carry keys"""
+    return os.getenv(f"{provider.upper()}_API_KEY") if provider and provider != "ollama" else None
+
+
+def job_json(job: Job) -> Dict[str, Any]:
+    """Public state of a job"""
+    stats = {
+        "llm_cache": job.llm_cache_stats,
+        "compaction": job.compaction_stats,
+        "checkpoints": job.checkpoint_stats,
+        "retrieval": job.retrieval_stats,
+        "hedge": job.hedge_stats,
+    }
+    return {
+        "id": job.id,
+        "company": job.company,
+        "provider": job.provider,
+        "model": job.model,
+        "current_date": job.current_date,
+        "status": job.status,
+        "progress": round(job.progress, 3),
+        "task_names": job.task_names,
+        "completed_tasks": job.completed_tasks,
+        "active_tasks": job.active_tasks(),
+        "last_step": job.last_step,
+        "error": job.error,
+        "requests": job.requests,
+        "submitted_at": job.submitted_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "stats": {name: value for name, value in stats.items() if value is not None},
+        "metrics": job.metrics,
+    }
+
+
+def _progress(job: Job) -> Dict[str, Any]:
+    return {
+        "status": job.status,
+        "progress": round(job.progress, 3),
+        "completed_tasks": list(job.completed_tasks),
+        "active_tasks": job.active_tasks(),
+        "last_step": job.last_step,
+    }
+
+
+def _event(name: str, data: Any) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def _error(status: int, message: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+
+def create_app(manager: Optional[JobManager] = None) -> Starlette:
+    """HTTP job API over a JobManager
+
+    POST /jobs submits a run (identical requests share one, see
+    JobManager.submit), GET /jobs/{id} reports its state, GET
+    /jobs/{id}/events streams progress and report tokens as server-sent
+    events, GET /jobs/{id}/artifacts[/{name}] lists and serves its output
+    files, and POST /jobs/{id}/cancel?request_id=... withdraws the submission
+    that returned that request_id. There is no authentication: anyone who can
+    reach the server can submit runs and read every job.
+    """
+    manager = manager or JobManager(max_workers=API_WORKERS, max_queued=API_QUEUE_SIZE)
+
+    def find(request: Request) -> Optional[Job]:
+        return manager.get(request.path_params["job_id"])
+
+    async def submit(request: Request) -> Response:
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            return _error(400, "Request body must be a JSON object")
+        for name in TEXT_FIELDS:
+            if body.get(name) is not None and not isinstance(body[name], str):
+                return _error(400, f"{name} must be a string")
+
+        request_id = uuid.uuid4().hex
+        company = str(body.get("company") or "").strip()
+        provider = body.get("provider") or "ollama"
+        model = body.get("model") or "llama3.1:8b"
+        priority = body.get("priority") or "interactive"
+        hedge = body.get("hedge") or None
+        if not company:
+            return _error(400, "company is required")
+        if provider not in PROVIDERS:
+            return _error(400, f"provider must be one of {', '.join(PROVIDERS)}")
+        if priority not in PRIORITIES:
+            return _error(400, f"priority must be one of {', '.join(PRIORITIES)}")
+        api_key = provider_api_key(provider)
+        if provider != "ollama" and not api_key:
+            return _error(400, f"{provider.upper()}_API_KEY is not configured on the server")
+        hedge_provider = hedge.partition("/")[0] if hedge else ""
+        if hedge and hedge_provider not in PROVIDERS:
+            return _error(400, "hedge must be provider/model")
+
+        try:
+            job = manager.submit(
+                company=company,
+                provider=provider,
+                model=model,
+                api_key=api_key,
+                hedge=hedge,
+                hedge_api_key=provider_api_key(hedge_provider),
+                priority=priority,
+                request_id=request_id,
+                **{option: bool(body.get(option, False)) for option in OPTIONS},
+            )
+        except QueueFull as e:
+            return _error(429, str(e), headers={"Retry-After": "30"})
+        # request_id is only returned here: it is what entitles a caller to cancel
+        return JSONResponse(
+            {**job_json(job), "request_id": request_id}, status_code=202, headers={"Location": f"/jobs/{job.id}"}
+        )
+
+    async def status(request: Request) -> Response:
+        job = find(request)
+        return JSONResponse(job_json(job)) if job else _error(404, "Unknown job")
+
+    async def events(request: Request) -> Response:
+        job = find(request)
+        if job is None:
+            return _error(404, "Unknown job")
+
+        async def stream():
+            last, sent = None, ""
+            while True:
+                progress = _progress(job)
+                if progress != last:
+                    yield _event("progress", progress)
+                    last = progress
+                report = job.report_preview
+                if report != sent:
+                    # The preview restarts once the writer's final answer begins
+                    if report.startswith(sent):
+                        yield _event("report", {"text": report[len(sent):]})
+                    else:
+                        yield _event("report", {"text": report, "reset": True})
+                    sent = report
+                if job.done:
+                    yield _event("done", job_json(job))
+                    return
+                if await request.is_disconnected():
+                    return
+                await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+        return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    async def artifacts(request: Request) -> Response:
+        job = find(request)
+        if job is None:
+            return _error(404, "Unknown job")
+        files = sorted(os.listdir(job.output_dir)) if os.path.isdir(job.output_dir) else []
+        return JSONResponse({"job": job.id, "status": job.status, "files": files})
+
+    async def artifact(request: Request) -> Response:
+        job = find(request)
+        if job is None:
+            return _error(404, "Unknown job")
+        name = request.path_params["name"]
+        # Only files the run wrote, never a path out of its directory
+        if not os.path.isdir(job.output_dir) or name not in os.listdir(job.output_dir):
+            return _error(404, "Unknown artifact")
+        media_type = "text/markdown" if name.endswith(".md") else None
+        return FileResponse(os.path.join(job.output_dir, name), media_type=media_type)
+
+    async def cancel(request: Request) -> Response:
+        request_id = request.query_params.get("request_id", "")
+        job = manager.cancel(request.path_params["job_id"], request_id)
+        if job is None:
+            return _error(404, "Unknown job")
+        if request_id not in job.request_ids | job.withdrawn_ids:
+            return _error(403, "request_id is not a submission of this job")
+        if job.done and request_id not in job.withdrawn_ids:
+            return _error(409, f"Job already {job.status}")
+        return JSONResponse(job_json(job), status_code=202)
+
+    async def health(request: Request) -> Response:
+        return JSONResponse({"status": "ok", "queued": manager.queued(), "max_queued": manager.max_queued})
+
+    async def metrics(request: Request) -> Response:
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    return Starlette(routes=[
+        Route("/jobs", submit, methods=["POST"]),
+        Route("/jobs/{job_id}", status),
+        Route("/jobs/{job_id}/events", events),
+        Route("/jobs/{job_id}/artifacts", artifacts),
+        Route("/jobs/{job_id}/artifacts/{name}", artifact),
+        Route("/jobs/{job_id}/cancel", cancel, methods=["POST"]),
+        Route("/health", health),
+        Route("/metrics", metrics),
+    ])
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=API_HOST, port=API_PORT)
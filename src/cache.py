@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Caches live next to the outputs (relative to src/) unless overridden
+CACHE_DIR = os.getenv("RESEARCH_CACHE_DIR", ".cache")
+
+
+def hash_key(*parts: Any) -> str:
+    """Stable SHA-256 key for any JSON-serializable parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """SQLite-backed key/value cache with a TTL and an LRU size cap
+
+    Values are stored as JSON. One instance can be shared between threads,
+    and several processes can use the same file (WAL mode).
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None when missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value and evict the least recently used entries over the cap"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def values(self) -> List[Any]:
+        """Every unexpired value, least recently used first"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT value FROM entries WHERE created_at >= ? ORDER BY accessed_at", (cutoff,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counts for this process plus the current entry count"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+class PageCache:
+    """Scraped pages keyed by URL, with bodies deduplicated by content hash
+
+    Each URL keeps the validators (ETag, Last-Modified) needed for a
+    conditional GET; the extracted text is stored once per distinct body.
+    Like DiskCache, pages not fetched or revalidated within ttl expire and
+    the least recently used ones over max_entries are evicted; bodies no
+    page refers to any more are deleted with them.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " content_hash TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]
+        if "accessed_at" not in columns:
+            # Page caches written before eviction existed
+            self._conn.execute("ALTER TABLE pages ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS bodies ("
+            " content_hash TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached page with its validators and text, or None when missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.etag, p.last_modified, p.content_hash, p.fetched_at, b.text"
+                " FROM pages p JOIN bodies b ON b.content_hash = p.content_hash"
+                " WHERE p.url = ?",
+                (url,),
+            ).fetchone()
+            if row is not None and now - row[3] > self.ttl:
+                self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._delete_unused_bodies()
+                self._conn.commit()
+                return None
+            if row is not None:
+                self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url))
+                self._conn.commit()
+        if row is None:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "content_hash": row[2],
+            "fetched_at": row[3],
+            "text": row[4],
+        }
+
+    def text_for_hash(self, content_hash: str) -> Optional[str]:
+        """Extracted text of a body seen before under any URL"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM bodies WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(
+        self,
+        url: str,
+        content_hash: str,
+        text: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Store a freshly downloaded page and evict expired and least recently used ones"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO bodies (content_hash, text) VALUES (?, ?)",
+                (content_hash, text),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_hash, fetched_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, now, now),
+            )
+            self._conn.execute("DELETE FROM pages WHERE fetched_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM pages WHERE url IN ("
+                " SELECT url FROM pages ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._delete_unused_bodies()
+            self._conn.commit()
+
+    def _delete_unused_bodies(self) -> None:
+        self._conn.execute(
+            "DELETE FROM bodies WHERE content_hash NOT IN (SELECT content_hash FROM pages)"
+        )
+
+    def touch(self, url: str) -> None:
+        """Mark a page as revalidated now"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+
+
+_shared: Dict[str, DiskCache] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_cache(name: str, ttl: float, max_entries: int) -> DiskCache:
+    """Process-wide DiskCache stored as CACHE_DIR/<name>.sqlite"""
+    with _shared_lock:
+        if name not in _shared:
+            _shared[name] = DiskCache(os.path.join(CACHE_DIR, f"{name}.sqlite"), ttl, max_entries)
+        return _shared[name]
+
+
+_shared_pages: Optional[PageCache] = None
+
+
+def shared_page_cache(ttl: float, max_entries: int) -> PageCache:
+    """Process-wide PageCache stored as CACHE_DIR/pages.sqlite"""
+    global _shared_pages
+    with _shared_lock:
+        if _shared_pages is None:
+            _shared_pages = PageCache(os.path.join(CACHE_DIR, "pages.sqlite"), ttl, max_entries)
+        return _shared_pages
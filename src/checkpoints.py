@@ -0,0 +1,165 @@
+import datetime
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+from pydantic import PrivateAttr
+
+from cache import DiskCache, hash_key, shared_cache
+from llm import resolve_llm
+
+# Task outputs are kept for resumed and repeated runs of the same inputs
+CHECKPOINT_TTL = float(os.getenv("CHECKPOINT_TTL", 30 * 24 * 60 * 60))
+CHECKPOINT_MAX_ENTRIES = int(os.getenv("CHECKPOINT_MAX_ENTRIES", 5000))
+
+# Part of every fingerprint; bump it when prompts are assembled differently so
+# old checkpoints stop matching
+CHECKPOINT_VERSION = 1
+
+
+class Checkpoints:
+    """Task outputs stored under a fingerprint of everything that produced them
+
+    The fingerprint covers the kickoff inputs (company, date), the model
+    serving the task, the interpolated task and agent prompts and the context
+    handed over by upstream tasks. Every finished task is checkpointed; with resume=True a
+    task whose fingerprint is already stored is restored instead of run. A
+    restored upstream output is passed on unchanged, so the run picks up at
+    the first task whose inputs differ.
+    """
+
+    def __init__(self, resume: bool = False, cache: Optional[DiskCache] = None):
+        self.resume = resume
+        self.cache = cache or shared_cache("checkpoints", CHECKPOINT_TTL, CHECKPOINT_MAX_ENTRIES)
+        self.inputs: Dict[str, Any] = {}
+        self.restored: List[str] = []
+        self.computed: List[str] = []
+        self._lock = threading.Lock()
+
+    def fingerprint(self, task: Task, agent: Any, context: Optional[str]) -> str:
+        """Key of a task's output given the inputs it is about to run with"""
+        llm = resolve_llm(agent.llm, task.name, agent.role)
+        return hash_key(
+            "checkpoint",
+            CHECKPOINT_VERSION,
+            task.name,
+            self.inputs,
+            {"provider": llm.provider, "model": llm.model, "temperature": llm.temperature},
+            task.description,
+            task.expected_output,
+            [agent.role, agent.goal, agent.backstory],
+            sorted(tool.name for tool in [*(agent.tools or []), *(task.tools or [])]),
+            context or "",
+        )
+
+    def load(self, key: str) -> Optional[str]:
+        """Checkpointed output text, or None when the task has to run"""
+        if not self.resume:
+            return None
+        entry = self.cache.get(key)
+        return entry["raw"] if entry else None
+
+    def attach(self, task: "CheckpointedTask") -> None:
+        """Checkpoint the task's output as soon as it completes
+
+        Attach after other callbacks that rewrite output.raw (context
+        compaction) so the checkpoint keeps the full text.
+        """
+        if task._checkpoints is self:
+            return
+        task._checkpoints = self
+        previous = task.callback
+
+        def callback(output):
+            if task._fingerprint and not task.restored:
+                self.cache.set(task._fingerprint, {"task": task.name, "raw": output.raw})
+                with self._lock:
+                    self.computed.append(task.name)
+            if previous:
+                previous(output)
+
+        task.callback = callback
+
+    def stats(self) -> Dict[str, Any]:
+        """Tasks restored from checkpoints and tasks run, in completion order"""
+        with self._lock:
+            return {"restored": list(self.restored), "computed": list(self.computed)}
+
+
+class CheckpointedTask(Task):
+    """Task that reuses its checkpointed output when its inputs are unchanged
+
+    Without attached Checkpoints it runs like a plain Task. Callbacks added
+    with on_error() receive the exception when the task fails, where
+    task.callback would never be called.
+    """
+
+    _checkpoints: Optional[Checkpoints] = PrivateAttr(default=None)
+    _fingerprint: Optional[str] = PrivateAttr(default=None)
+    _restored: bool = PrivateAttr(default=False)
+    _error_callbacks: List[Callable[[Exception], None]] = PrivateAttr(default_factory=list)
+
+    @property
+    def restored(self) -> bool:
+        """Whether the last execution was served from a checkpoint"""
+        return self._restored
+
+    def on_error(self, callback: Callable[[Exception], None]) -> None:
+        self._error_callbacks.append(callback)
+
+    def _execute_core(self, agent, context, tools) -> TaskOutput:
+        try:
+            return self._execute_checkpointed(agent, context, tools)
+        except Exception as e:
+            for callback in self._error_callbacks:
+                callback(e)
+            raise
+
+    def _execute_checkpointed(self, agent, context, tools) -> TaskOutput:
+        self._restored = False
+        agent = agent or self.agent
+        if self._checkpoints is None or agent is None:
+            return super()._execute_core(agent, context, tools)
+
+        self._fingerprint = self._checkpoints.fingerprint(self, agent, context)
+        raw = self._checkpoints.load(self._fingerprint)
+        if raw is None:
+            return super()._execute_core(agent, context, tools)
+        return self._restore(agent, context, raw)
+
+    def _execute_task_async(self, agent, context, tools, future) -> None:
+        # crewai leaves the future unresolved when an async task raises, and the
+        # kickoff waiting on it hangs instead of failing
+        try:
+            future.set_result(self._execute_core(agent, context, tools))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _restore(self, agent, context: Optional[str], raw: str) -> TaskOutput:
+        """Complete the task with a checkpointed output, as _execute_core would"""
+        self._restored = True
+        self.agent = agent
+        self.prompt_context = context
+        self.start_time = datetime.datetime.now()
+        self.output = TaskOutput(
+            name=self.name or self.description,
+            description=self.description,
+            expected_output=self.expected_output,
+            raw=raw,
+            agent=agent.role,
+            output_format=self._get_output_format(),
+        )
+        self.end_time = datetime.datetime.now()
+        with self._checkpoints._lock:
+            self._checkpoints.restored.append(self.name)
+
+        if self.callback:
+            self.callback(self.output)
+        crew = agent.crew
+        if crew and crew.task_callback and crew.task_callback != self.callback:
+            crew.task_callback(self.output)
+        if self.output_file:
+            self._save_file(raw)
+        return self.output
@@ -0,0 +1,179 @@
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Llama and GPT tokenizers average about four characters per token on English
+# prose, close enough for budgeting without loading a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Token budget for all context a task receives, split evenly between the tasks
+# it depends on. Sized so every prompt fits an 8k context window alongside the
+# task description and the agent's own reasoning.
+CONTEXT_BUDGETS: Dict[str, int] = {
+    "prepare_research_strategy": 1500,
+    "company_analysis": 1200,
+    "extract_financials": 1500,
+    "financial_data_analysis": 1200,
+    "risk_assessment": 1200,
+    "market_analysis": 1200,
+    "draft_report": 2400,
+    "finalize_report": 2400,
+}
+
+HEADING = re.compile(r"^\s*#{1,6}\s")
+LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[$])")
+NUMBER = re.compile(r"\d")
+KEY_TERMS = re.compile(
+    r"[%$€£]|\b(?:billion|million|revenue|sales|margin|profit|income|growth|eps|"
+    r"cash|debt|guidance|valuation|risk|market share|competitor|forecast)\b",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _split(text: str) -> List[Tuple[int, str, str, bool]]:
+    """(line number, list prefix, sentence, is heading) for each unit of the text"""
+    units = []
+    for line_no, line in enumerate(text.splitlines()):
+        if not line.strip():
+            continue
+        if HEADING.match(line):
+            units.append((line_no, "", line.strip(), True))
+            continue
+        match = LIST_ITEM.match(line)
+        prefix = match.group(0).strip() + " " if match else ""
+        body = line[match.end():] if match else line.strip()
+        for sentence in SENTENCE_BREAK.split(body.strip()):
+            if sentence:
+                units.append((line_no, prefix, sentence, False))
+    return units
+
+
+def _score(sentence: str, position: int) -> float:
+    """Information density of a sentence: facts and figures per token"""
+    score = 1.0 + 1.0 / (1 + position)
+    if NUMBER.search(sentence):
+        score += 2.0
+    score += min(len(KEY_TERMS.findall(sentence)), 3) * 0.5
+    return score / math.sqrt(max(estimate_tokens(sentence), 1))
+
+
+def compact_text(text: str, budget: int) -> str:
+    """Extract the densest sentences of a text that fit in a token budget
+
+    Headings, list markers and the original order are kept; a heading only
+    survives if something below it does. Text already within budget is
+    returned unchanged.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+
+    units = _split(text)
+    section_of: List[Optional[int]] = []
+    ranked = []
+    section, position = None, 0
+    for index, (_, _, sentence, is_heading) in enumerate(units):
+        if is_heading:
+            section, position = index, 0
+        else:
+            ranked.append((_score(sentence, position), index))
+            position += 1
+        section_of.append(section)
+
+    kept = set()
+    used = 0
+    for _, index in sorted(ranked, reverse=True):
+        heading = section_of[index]
+        cost = estimate_tokens(units[index][1] + units[index][2]) + 1
+        if heading is not None and heading not in kept:
+            cost += estimate_tokens(units[heading][2]) + 1
+        if used + cost > budget:
+            continue
+        kept.add(index)
+        if heading is not None:
+            kept.add(heading)
+        used += cost
+
+    lines: Dict[int, str] = {}
+    for index in sorted(kept):
+        line_no, prefix, sentence, is_heading = units[index]
+        if is_heading:
+            lines[line_no] = sentence
+        elif line_no in lines:
+            lines[line_no] += " " + sentence
+        else:
+            lines[line_no] = prefix + sentence
+    return "\n".join(lines[line_no] for line_no in sorted(lines))
+
+
+class ContextCompactor:
+    """Shrinks task outputs to the context budget of the tasks that consume them
+
+    attach() hooks a task's callback, which runs after the output is recorded
+    but before it is handed on as context. Only output.raw, the text later
+    tasks see, is compacted; the task's output file keeps the full text.
+    """
+
+    def __init__(self, dependencies: Dict[str, List[str]], budgets: Optional[Dict[str, int]] = None):
+        self.dependencies = dependencies
+        self.budgets = CONTEXT_BUDGETS if budgets is None else budgets
+        self._attached: set = set()
+        self._tasks: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def budget_for(self, task_name: str) -> Optional[int]:
+        """Tokens the task's output may take up, or None if nothing limits it"""
+        shares = [
+            self.budgets[consumer] // len(deps)
+            for consumer, deps in self.dependencies.items()
+            if task_name in deps and consumer in self.budgets
+        ]
+        return min(shares) if shares else None
+
+    def attach(self, task: Any) -> None:
+        """Compact the task's output once it completes, then run its own callback"""
+        budget = self.budget_for(task.name)
+        if budget is None or task.name in self._attached:
+            return
+        self._attached.add(task.name)
+        previous = task.callback
+
+        def callback(output):
+            self.compact(task.name, output, budget)
+            if previous:
+                previous(output)
+
+        task.callback = callback
+
+    def compact(self, task_name: str, output: Any, budget: int) -> None:
+        original = estimate_tokens(output.raw)
+        if original > budget:
+            output.raw = compact_text(output.raw, budget)
+        consumers = sum(task_name in deps for deps in self.dependencies.values())
+        with self._lock:
+            self._tasks[task_name] = {
+                "budget": budget,
+                "original_tokens": original,
+                "compacted_tokens": estimate_tokens(output.raw),
+                "consumers": consumers,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-task token counts before and after compaction and the prompt tokens saved
+
+        An output passed to several tasks saves its difference once per consumer.
+        """
+        with self._lock:
+            tasks = {name: dict(counts) for name, counts in self._tasks.items()}
+        return {
+            "tasks": tasks,
+            "tokens_saved": sum(
+                (t["original_tokens"] - t["compacted_tokens"]) * t["consumers"] for t in tasks.values()
+            ),
+        }
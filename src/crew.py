@@ -1,12 +1,23 @@
-from typing import List, Optional
-from crewai import Agent, Crew, Process, Task, LLM
-from crewai.project import CrewBase, agent, crew, task
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from crewai import Agent, Crew, Process, Task
+from crewai.llms.base_llm import BaseLLM
+from crewai.project import CrewBase, agent, before_kickoff, crew, task
 
-from crewai_tools import SerperDevTool, ScrapeWebsiteTool
-from numpy import concatenate
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+from checkpoints import CheckpointedTask, Checkpoints
+from compaction import ContextCompactor
+from financials import FinancialStatements, RatioEngine
+from llm import DEFAULT_MODEL, DEFAULT_PROVIDER, CancellableLLM, create_llm, limited, metered, run_scoped, with_streaming
+from peers import PeerComparisonTool, shared_universe
+from retrieval import ResearchCorpusTool, VectorIndex
+from runs import OUTPUT_ROOT, run_output_dir
+from streaming import ReportStream, stop_streaming, stream_task
+from telemetry import REGISTRY, RunMetrics
+from tools import CachedScrapeTool, CachedSearchTool
+
 _ = load_dotenv(override=True)
 
 # LLM Configuration
@@ -19,36 +30,73 @@ _ = load_dotenv(override=True)
 #   - reasoning=True (requires 8B+ params)
 #   - planning=True (requires 8B+ params)
 #   - output_json=Content (structured JSON output unreliable with small models)
-default_llm = LLM(
-    model="ollama/llama3.1:8b",
-    base_url="http://localhost:11434"
-)
-
-
-def create_llm(provider: str, model: str, api_key: Optional[str] = None) -> LLM:
-    """Create LLM instance based on provider and model"""
-    if provider == "ollama":
-        return LLM(
-            model=f"ollama/{model}",
-            base_url="http://localhost:11434"
-        )
-    elif provider == "openai":
-        return LLM(
-            model=f"openai/{model}",
-            api_key=api_key
-        )
-    elif provider == "anthropic":
-        return LLM(
-            model=f"anthropic/{model}",
-            api_key=api_key
-        )
-    elif provider == "groq":
-        return LLM(
-            model=f"groq/{model}",
-            api_key=api_key
-        )
-    else:
-        return default_llm
+def default_llm() -> BaseLLM:
+    """Pooled client for the default model, created on first use"""
+    return create_llm(DEFAULT_PROVIDER, DEFAULT_MODEL)
+
+
+# Task dependency graphs: each task lists the tasks whose output it receives as
+# context. The sequential graph is the original one-after-another chain; the
+# parallel graph lets the analysis tasks start from the research strategy at
+# the same time and joins their outputs again in draft_report. Financial data
+# analysis waits for the figures and ratios of extract_financials.
+SEQUENTIAL_DEPENDENCIES: Dict[str, List[str]] = {
+    "financial_research": [],
+    "prepare_research_strategy": ["financial_research"],
+    "company_analysis": ["prepare_research_strategy"],
+    "extract_financials": ["financial_research", "company_analysis"],
+    "financial_data_analysis": ["company_analysis", "extract_financials"],
+    "risk_assessment": ["financial_data_analysis"],
+    "market_analysis": ["risk_assessment"],
+    "draft_report": ["market_analysis"],
+    "finalize_report": ["draft_report"],
+}
+
+PARALLEL_DEPENDENCIES: Dict[str, List[str]] = {
+    "financial_research": [],
+    "prepare_research_strategy": ["financial_research"],
+    "company_analysis": ["prepare_research_strategy"],
+    "extract_financials": ["financial_research", "prepare_research_strategy"],
+    "financial_data_analysis": ["prepare_research_strategy", "extract_financials"],
+    "risk_assessment": ["prepare_research_strategy"],
+    "market_analysis": ["prepare_research_strategy"],
+    "draft_report": [
+        "company_analysis",
+        "financial_data_analysis",
+        "risk_assessment",
+        "market_analysis",
+    ],
+    "finalize_report": ["draft_report"],
+}
+
+
+def plan_stages(dependencies: Dict[str, List[str]]) -> List[List[str]]:
+    """Group tasks into stages that only depend on earlier stages
+
+    Tasks sharing a stage are independent of each other and can run
+    concurrently. CrewAI joins concurrent tasks at the next synchronous task,
+    so a stage with several tasks must be followed by a single-task stage.
+    """
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    done: set = set()
+    stages: List[List[str]] = []
+
+    while remaining:
+        stage = [name for name, deps in remaining.items() if deps <= done]
+        if not stage:
+            raise ValueError(f"Task dependencies contain a cycle: {sorted(remaining)}")
+        stages.append(stage)
+        done.update(stage)
+        for name in stage:
+            del remaining[name]
+
+    for current, following in zip(stages, stages[1:] + [[]]):
+        if len(current) > 1 and len(following) != 1:
+            raise ValueError(
+                f"Concurrent tasks {current} must be joined by exactly one following task"
+            )
+
+    return stages
 
 
 # Pydantic Schema for Inputs
@@ -67,9 +115,119 @@ class ResearchCrew():
     agents_config = "config/agents.yaml"
     tasks_config = "config/tasks.yaml"
 
-    def __init__(self, llm_instance: Optional[LLM] = None):
-        """Initialize ResearchCrew with optional LLM instance"""
-        self.llm_instance = llm_instance or default_llm
+    def __init__(
+        self,
+        llm_instance: Optional[BaseLLM] = None,
+        parallel: bool = False,
+        output_dir: str = OUTPUT_ROOT,
+        search_backend: Optional[Any] = None,
+        task_callback: Optional[Callable[[Any], None]] = None,
+        step_callback: Optional[Callable[[Any], None]] = None,
+        stream_report: bool = False,
+        on_report_chunk: Optional[Callable[[str], None]] = None,
+        compact_context: bool = False,
+        context_budgets: Optional[Dict[str, int]] = None,
+        resume: bool = False,
+        retrieval: bool = False,
+        priority: Any = "interactive",
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        """Initialize ResearchCrew with optional LLM instance
+
+        With parallel=True, tasks are wired through PARALLEL_DEPENDENCIES and
+        independent tasks run concurrently instead of one after another.
+        output_dir is the run's own namespace, see runs.run_output_dir().
+        search_backend replaces SerperDevTool behind the search cache.
+        task_callback and step_callback are handed to the Crew for progress reporting.
+        With stream_report=True the report writer streams its tokens into
+        self.report_stream (and on_report_chunk) while finalize_report runs.
+        With compact_context=True each task output is condensed to the token
+        budget of the tasks consuming it (context_budgets, by default
+        compaction.CONTEXT_BUDGETS) before it is passed on; see self.compactor.
+        With retrieval=True searched and scraped text is chunked into
+        self.research_index, scrapes return only the start of a page, and the
+        research and analyst agents get a ResearchCorpusTool to query it.
+        LLM, search and scrape requests queue for the process-wide limits in
+        limits.GOVERNOR; priority ("interactive" or "batch", or a
+        limits.SharedPriority to change it during the run) orders the queue.
+        Once cancel_event is set, the next LLM call raises llm.RunCancelled.
+        extract_financials answers with FinancialStatements JSON; self.ratio_engine turns
+        them into computed ratios that financial_data_analysis receives instead.
+        The researched company then joins self.peer_universe, which
+        market_analysis queries through a PeerComparisonTool once it holds
+        other companies.
+        Every task output is checkpointed (self.checkpoints); with resume=True
+        tasks whose inputs match a checkpoint are restored instead of run.
+        Per-task and per-agent timings, token counts and tool calls are
+        collected in self.metrics; call write_metrics() after the kickoff.
+        """
+        self.metrics = RunMetrics()
+        self.llm_instance = metered(limited(run_scoped(llm_instance or default_llm()), priority), self.metrics)
+        if cancel_event is not None:
+            self.llm_instance = CancellableLLM(self.llm_instance, cancel_event)
+        self.output_dir = output_dir
+        self.research_index = VectorIndex() if retrieval else None
+        self.search_tool = CachedSearchTool(backend=search_backend, index=self.research_index, priority=priority)
+        self.scrape_tool = CachedScrapeTool(index=self.research_index, priority=priority)
+        self.corpus_tools = [ResearchCorpusTool(index=self.research_index)] if retrieval else []
+        self.task_callback = task_callback
+        self.step_callback = step_callback
+        self.report_stream = (
+            ReportStream(self._output_path("report.md"), on_chunk=on_report_chunk)
+            if stream_report else None
+        )
+        self.dependencies = PARALLEL_DEPENDENCIES if parallel else SEQUENTIAL_DEPENDENCIES
+        self.concurrent_tasks = {
+            name
+            for stage in plan_stages(self.dependencies)
+            if len(stage) > 1
+            for name in stage
+        }
+        self.compactor = (
+            ContextCompactor(self.dependencies, context_budgets) if compact_context else None
+        )
+        self.checkpoints = Checkpoints(resume=resume)
+        self.peer_universe = shared_universe()
+        self.ratio_engine = RatioEngine(self._output_path("financial_ratios.md"), on_ratios=self._record_peer)
+        self.peer_tool = PeerComparisonTool(universe=self.peer_universe, ratio_engine=self.ratio_engine)
+        self.stage_order = {
+            name: number for number, stage in enumerate(plan_stages(self.dependencies)) for name in stage
+        }
+
+    def _context(self, task_name: str) -> List[Task]:
+        """Tasks whose output is passed as context to the given task"""
+        return [getattr(self, name)() for name in self.dependencies[task_name]]
+
+    def _output_path(self, filename: str) -> str:
+        """Path of a task output file inside this run's output directory"""
+        return f"{self.output_dir}/{filename}"
+
+    def _runs_async(self, task_name: str) -> bool:
+        """Whether the task runs concurrently with the rest of its stage"""
+        return task_name in self.concurrent_tasks
+
+    def write_metrics(self) -> Dict[str, Any]:
+        """Finish this run's metrics, write them to metrics.json and add them to REGISTRY"""
+        self.metrics.finish(self.tasks)
+        self.metrics.write(self._output_path("metrics.json"))
+        summary = self.metrics.to_dict()
+        REGISTRY.observe_run(summary)
+        return summary
+
+    def _record_peer(self, statements: FinancialStatements, table: Any) -> None:
+        """Add this run's company and its ratios to the peer universe"""
+        company = self.checkpoints.inputs.get("company") or statements.company
+        self.peer_universe.record_run(company, statements, table)
+
+    @before_kickoff
+    def record_inputs(self, inputs: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Make the kickoff inputs part of every checkpoint fingerprint"""
+        self.checkpoints.inputs = dict(inputs or {})
+        self.peer_tool.company = self.checkpoints.inputs.get("company", "")
+        # Peer comparison only helps once other companies have fundamentals
+        if self.peer_universe.has_peers(self.peer_tool.company):
+            self.market_analysis().tools = [*self.corpus_tools, self.peer_tool]
+        return inputs
 
     @agent
     def head_of_research(self) -> Agent:
@@ -77,8 +235,9 @@ class ResearchCrew():
         return Agent(
             config=self.agents_config["head_of_research"],
             tools=[
-                SerperDevTool(),
-                ScrapeWebsiteTool(),
+                self.search_tool,
+                self.scrape_tool,
+                *self.corpus_tools,
             ],
             # reasoning=True,  # Disabled - requires more capable model (8B+ params)
             inject_date=True,
@@ -92,7 +251,7 @@ class ResearchCrew():
         """Financial Analyst"""
         return Agent(
             config=self.agents_config["financial_analyst"],
-            tools=[],
+            tools=list(self.corpus_tools),
             inject_date=True,
             llm=self.llm_instance,
             allow_delegation=False,
@@ -105,7 +264,7 @@ class ResearchCrew():
         """Data Analyst"""
         return Agent(
             config=self.agents_config["data_analyst"],
-            tools=[],
+            tools=list(self.corpus_tools),
             inject_date=True,
             llm=self.llm_instance,
             allow_delegation=False,
@@ -120,7 +279,7 @@ class ResearchCrew():
             config=self.agents_config["report_writer"],
             tools=[],
             inject_date=True,
-            llm=self.llm_instance,
+            llm=with_streaming(self.llm_instance) if self.report_stream else self.llm_instance,
             allow_delegation=False,
             max_iterations=30
         )
@@ -129,43 +288,62 @@ class ResearchCrew():
     @task
     def financial_research(self) -> Task:
         """Financial Research"""
-        return Task(
+        return CheckpointedTask(
             config=self.tasks_config["financial_research"],
             agent=self.head_of_research(),
-            output_file="output/financial_research.md",
+            context=self._context("financial_research"),
+            async_execution=self._runs_async("financial_research"),
+            output_file=self._output_path("financial_research.md"),
         )
 
 
     @task
     def prepare_research_strategy(self) -> Task:
         """Prepare Research Strategy"""
-        return Task(
+        return CheckpointedTask(
             config=self.tasks_config["prepare_research_strategy"],
             agent=self.head_of_research(),
-            output_file="output/research_strategy.md",
-            context=[self.financial_research()],
+            context=self._context("prepare_research_strategy"),
+            async_execution=self._runs_async("prepare_research_strategy"),
+            output_file=self._output_path("research_strategy.md"),
         )
 
     
     @task
     def company_analysis(self) -> Task:
         """Company Analysis"""
-        return Task(
+        return CheckpointedTask(
             config=self.tasks_config["company_analysis"],
             agent=self.financial_analyst(),
-            output_file="output/company_analysis.md",
-            context=[self.prepare_research_strategy()],
+            context=self._context("company_analysis"),
+            async_execution=self._runs_async("company_analysis"),
+            output_file=self._output_path("company_analysis.md"),
+        )
+
+    
+    @task
+    def extract_financials(self) -> Task:
+        """Extract Financials"""
+        return CheckpointedTask(
+            config=self.tasks_config["extract_financials"],
+            agent=self.head_of_research(),
+            context=self._context("extract_financials"),
+            async_execution=self._runs_async("extract_financials"),
+            # Parsed by self.ratio_engine: with output_pydantic, an answer that is not
+            # valid JSON fails the whole kickoff in crewai's converter
+            output_file=self._output_path("financials.json"),
         )
 
     
     @task
     def financial_data_analysis(self) -> Task:
         """Financial Data Analysis"""
-        return Task(
+        return CheckpointedTask(
             config=self.tasks_config["financial_data_analysis"],
             agent=self.financial_analyst(),
-            output_file="output/financial_data_analysis.md",
-            context=[self.company_analysis()],
+            context=self._context("financial_data_analysis"),
+            async_execution=self._runs_async("financial_data_analysis"),
+            output_file=self._output_path("financial_data_analysis.md"),
             # output_json=Content  # Disabled - small model can't reliably produce structured JSON
         )
 
@@ -173,11 +351,12 @@ class ResearchCrew():
     @task
     def risk_assessment(self) -> Task:
         """Risk Assessment"""
-        return Task(
+        return CheckpointedTask(
             config=self.tasks_config["risk_assessment"],
             agent=self.financial_analyst(),
-            output_file="output/risk_assessment.md",
-            context=[self.financial_data_analysis()],
+            context=self._context("risk_assessment"),
+            async_execution=self._runs_async("risk_assessment"),
+            output_file=self._output_path("risk_assessment.md"),
             # output_json=Content  # Disabled - small model can't reliably produce structured JSON
         )
 
@@ -185,22 +364,25 @@ class ResearchCrew():
     @task
     def market_analysis(self) -> Task:
         """Market Analysis"""
-        return Task(
+        return CheckpointedTask(
             config=self.tasks_config["market_analysis"],
             agent=self.data_analyst(),
-            output_file="output/market_analysis.md",
-            context=[self.risk_assessment()],
+            context=self._context("market_analysis"),
+            tools=list(self.corpus_tools),
+            async_execution=self._runs_async("market_analysis"),
+            output_file=self._output_path("market_analysis.md"),
         )
     
 
     @task
     def draft_report(self) -> Task:
         """Draft Report"""
-        return Task(
+        return CheckpointedTask(
             config=self.tasks_config["draft_report"],
             agent=self.data_analyst(),
-            output_file="output/draft_report.md",
-            context=[self.market_analysis()],
+            context=self._context("draft_report"),
+            async_execution=self._runs_async("draft_report"),
+            output_file=self._output_path("draft_report.md"),
             # output_json=Content  # Disabled - small model can't reliably produce structured JSON
         )
 
@@ -208,23 +390,48 @@ class ResearchCrew():
     @task
     def finalize_report(self) -> Task:
         """Finalize Report"""
-        return Task(
+        report = CheckpointedTask(
             config=self.tasks_config["finalize_report"],
             agent=self.report_writer(),
-            output_file="output/report.md",
-            context=[self.draft_report()],
+            context=self._context("finalize_report"),
+            async_execution=self._runs_async("finalize_report"),
+            output_file=self._output_path("report.md"),
             # output_json=Content  # Disabled - small model can't reliably produce structured JSON
         )
+        if self.report_stream:
+            stream_task(report, self.report_stream)
+            report.callback = lambda output: stop_streaming(report)
+        return report
 
 
     @crew
     def crew(self) -> Crew:
         """Research Crew"""
+        if self.compactor:
+            for task in self.tasks:
+                self.compactor.attach(task)
+        # Ratios replace the extracted JSON before compaction sees the output
+        self.ratio_engine.attach(self.extract_financials())
+        # Last, so checkpoints are taken before any callback rewrites the output
+        for task in self.tasks:
+            self.checkpoints.attach(task)
+        self.metrics.watch(self.tasks)
+        # crewai keeps the executor and message history of the running task on
+        # its Agent, so every concurrent task gets its own copy of its agent
+        agents = list(self.agents)
+        for task in self.tasks:
+            if self._runs_async(task.name):
+                task.agent = task.agent.copy()
+                agents.append(task.agent)
+        # In stage order, so every concurrent stage is joined by the task after it
+        tasks = sorted(self.tasks, key=lambda task: self.stage_order[task.name])
         return Crew(
-            agents=self.agents,
-            tasks=self.tasks,
+            agents=agents,
+            tasks=tasks,
             process=Process.sequential,
             verbose=True,
+            task_callback=self.task_callback,
+            step_callback=self.step_callback,
             # Planning disabled - gemma3:1b (1B params) is too small for reliable planning
             # To enable: use a larger model like llama3:8b or gpt-4 for planning_llm
             planning=False,
@@ -241,7 +448,8 @@ if __name__ == "__main__":
         "current_date": datetime.now().strftime("%Y-%m-%d"),
     }
 
-    research_crew = ResearchCrew(llm_instance=default_llm)
+    output_dir = run_output_dir(inputs["company"])
+    research_crew = ResearchCrew(llm_instance=default_llm(), output_dir=output_dir)
     research_crew.crew().kickoff(inputs=inputs)
 
-    print("Research Crew has completed the task.")
+    print(f"Research Crew has completed the task. Outputs are in {output_dir}/")
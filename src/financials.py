@@ -0,0 +1,334 @@
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+YEAR = re.compile(r"(19|20)\d{2}")
+
+# Magnitude words and suffixes, in units; "$2.3B" is 2.3e9 and "USD millions" 1e6
+MAGNITUDES: Dict[str, float] = {
+    "k": 1e3, "thousand": 1e3, "thousands": 1e3,
+    "m": 1e6, "mn": 1e6, "mm": 1e6, "million": 1e6, "millions": 1e6,
+    "b": 1e9, "bn": 1e9, "billion": 1e9, "billions": 1e9,
+    "t": 1e12, "tn": 1e12, "trillion": 1e12, "trillions": 1e12,
+}
+
+# Currency signs and codes stripped from figures written as text
+CURRENCY_MARKS = re.compile(r"[$€£¥]|\b(?:usd|us|eur|gbp|jpy|cny|chf|cad|aud)\b")
+FIGURE = re.compile(r"(\d+(?:\.\d+)?)\s*([a-z]*)")
+
+
+def unit_factor(unit: str) -> Optional[float]:
+    """Size of a statement unit such as "USD millions" or "bn", None if not recognized"""
+    factors = {MAGNITUDES[word] for word in unit.lower().replace(".", " ").split() if word in MAGNITUDES}
+    return factors.pop() if len(factors) == 1 else None
+
+
+def parse_figure(value: Any, unit: Optional[float]) -> Optional[float]:
+    """A figure as a float in the statement's unit, or None when it cannot be read
+
+    Numbers pass through. Text may carry currency signs or codes, thousands
+    separators, a leading minus or accounting parentheses, and a magnitude
+    suffix ("$2.3B"), which needs the unit's size to convert.
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    text = CURRENCY_MARKS.sub("", value.strip().lower()).replace(",", "").strip()
+    negative = text.startswith(("-", "\u2212")) or (text.startswith("(") and text.endswith(")"))
+    match = FIGURE.fullmatch(text.strip("()-\u2212 "))
+    if match is None:
+        return None
+    number = float(match.group(1))
+    if match.group(2):
+        magnitude = MAGNITUDES.get(match.group(2))
+        if magnitude is None or unit is None:
+            return None
+        number = number * magnitude / unit
+    return -number if negative else number
+
+
+class FinancialPeriod(BaseModel):
+    """Reported line items of one fiscal period, in the statement's unit"""
+    period: str = Field(..., description="Fiscal period, e.g. 'FY2024' or 'Q3 2025'")
+    revenue: Optional[float] = Field(None, description="Total revenue or net sales")
+    cost_of_revenue: Optional[float] = Field(None, description="Cost of revenue or cost of goods sold")
+    gross_profit: Optional[float] = Field(None, description="Gross profit")
+    operating_income: Optional[float] = Field(None, description="Operating income (EBIT)")
+    net_income: Optional[float] = Field(None, description="Net income attributable to shareholders")
+    total_assets: Optional[float] = Field(None, description="Total assets")
+    total_equity: Optional[float] = Field(None, description="Total shareholders' equity")
+    total_debt: Optional[float] = Field(None, description="Short- plus long-term debt")
+    cash: Optional[float] = Field(None, description="Cash, cash equivalents and short-term investments")
+    current_assets: Optional[float] = Field(None, description="Total current assets")
+    current_liabilities: Optional[float] = Field(None, description="Total current liabilities")
+    operating_cash_flow: Optional[float] = Field(None, description="Net cash from operating activities")
+    capital_expenditure: Optional[float] = Field(None, description="Capital expenditure, as a positive number")
+
+
+class FinancialStatements(BaseModel):
+    """Line items of a company's recent fiscal periods as stated in the research"""
+    company: str = Field(..., description="The company the figures belong to")
+    sector: Optional[str] = Field(None, description="Industry sector, e.g. Technology or Health Care")
+    currency: str = Field("USD", description="Reporting currency, e.g. USD")
+    unit: str = Field("millions", description="Unit of every figure, e.g. millions or billions")
+    periods: List[FinancialPeriod] = Field(
+        default_factory=list, description="One entry per fiscal period found, oldest first"
+    )
+
+    @model_validator(mode="before")
+    @classmethod
+    def read_figures(cls, data: Any) -> Any:
+        """Figures written as text become numbers, or None when unreadable, instead of failing the parse"""
+        if not isinstance(data, dict) or not isinstance(data.get("periods"), list):
+            return data
+        unit = unit_factor(str(data.get("unit") or "millions"))
+        items = [name for name in FinancialPeriod.model_fields if name != "period"]
+        periods = [
+            {**period, **{item: parse_figure(period.get(item), unit) for item in items if item in period}}
+            if isinstance(period, dict) else period
+            for period in data["periods"]
+        ]
+        return {**data, "periods": periods}
+
+
+LINE_ITEMS: Tuple[str, ...] = tuple(name for name in FinancialPeriod.model_fields if name != "period")
+
+# name -> (numerator, denominator, format); "%" is shown as a percentage and
+# "x" as a multiple. free_cash_flow is derived before the ratios are taken.
+RATIOS: Dict[str, Tuple[str, str, str]] = {
+    "Gross margin": ("gross_profit", "revenue", "%"),
+    "Operating margin": ("operating_income", "revenue", "%"),
+    "Net margin": ("net_income", "revenue", "%"),
+    "Free cash flow margin": ("free_cash_flow", "revenue", "%"),
+    "Return on equity": ("net_income", "total_equity", "%"),
+    "Return on assets": ("net_income", "total_assets", "%"),
+    "Debt to equity": ("total_debt", "total_equity", "x"),
+    "Current ratio": ("current_assets", "current_liabilities", "x"),
+    "Cash to debt": ("cash", "total_debt", "x"),
+    "Cash conversion": ("operating_cash_flow", "net_income", "x"),
+}
+
+# Year-over-year growth of these items, against the preceding period
+GROWTH: Dict[str, str] = {
+    "Revenue growth": "revenue",
+    "Operating income growth": "operating_income",
+    "Net income growth": "net_income",
+    "Free cash flow growth": "free_cash_flow",
+}
+
+COLUMNS: Tuple[str, ...] = LINE_ITEMS + ("free_cash_flow",)
+
+
+def parse_statements(text: str) -> Optional[FinancialStatements]:
+    """FinancialStatements from the first JSON object in a text, or None"""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end <= start:
+        return None
+    try:
+        return FinancialStatements.model_validate_json(text[start:end + 1])
+    except ValidationError:
+        return None
+
+
+def _period_key(period: str) -> Tuple[int, str]:
+    years = YEAR.search(period)
+    return (int(years.group(0)) if years else 0, period)
+
+
+def statement_matrix(statements: FinancialStatements) -> Tuple[List[str], np.ndarray]:
+    """Periods (oldest first) and a periods x COLUMNS float matrix, NaN where not reported
+
+    Gross profit missing from a period is filled in as revenue less cost of
+    revenue, and free cash flow is operating cash flow less capital expenditure.
+    """
+    periods = sorted(statements.periods, key=lambda p: _period_key(p.period))
+    matrix = np.array(
+        [[np.nan if getattr(p, item) is None else getattr(p, item) for item in LINE_ITEMS] + [np.nan]
+         for p in periods],
+        dtype=np.float64,
+    ).reshape(len(periods), len(COLUMNS))
+    column = {name: i for i, name in enumerate(COLUMNS)}
+    gross = matrix[:, column["gross_profit"]]
+    np.copyto(gross, matrix[:, column["revenue"]] - matrix[:, column["cost_of_revenue"]], where=np.isnan(gross))
+    matrix[:, column["free_cash_flow"]] = (
+        matrix[:, column["operating_cash_flow"]] - np.abs(matrix[:, column["capital_expenditure"]])
+    )
+    return [p.period for p in periods], matrix
+
+
+@dataclass
+class RatioTable:
+    """Computed ratios and growth rates, one row per metric and one column per period"""
+    periods: List[str]
+    metrics: List[str]
+    formats: List[str]
+    values: np.ndarray
+
+    def as_dict(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """{metric: {period: value}}, None where it could not be computed"""
+        return {
+            metric: {
+                period: None if np.isnan(value) else round(float(value), 4)
+                for period, value in zip(self.periods, row)
+            }
+            for metric, row in zip(self.metrics, self.values)
+        }
+
+
+def compute_ratios(statements: FinancialStatements) -> RatioTable:
+    """Margins, returns, leverage, liquidity and growth of every period, computed at once
+
+    A ratio is NaN where an input is missing or its denominator is zero;
+    growth is NaN for the first period and against a non-positive base.
+    """
+    periods, matrix = statement_matrix(statements)
+    column = {name: i for i, name in enumerate(COLUMNS)}
+
+    numerators = matrix[:, [column[num] for num, _, _ in RATIOS.values()]]
+    denominators = matrix[:, [column[den] for _, den, _ in RATIOS.values()]]
+    ratios = np.full_like(numerators, np.nan)
+    np.divide(numerators, denominators, out=ratios, where=denominators != 0)
+
+    items = matrix[:, [column[item] for item in GROWTH.values()]]
+    growth = np.full_like(items, np.nan)
+    if len(periods) > 1:
+        previous, current = items[:-1], items[1:]
+        np.divide(current - previous, previous, out=growth[1:], where=previous > 0)
+
+    return RatioTable(
+        periods=periods,
+        metrics=list(RATIOS) + list(GROWTH),
+        formats=[fmt for _, _, fmt in RATIOS.values()] + ["%"] * len(GROWTH),
+        values=np.hstack([ratios, growth]).T,
+    )
+
+
+def format_value(value: float, fmt: str) -> str:
+    """A figure as a table cell: "%" as a percentage, "x" as a multiple, else a whole number"""
+    if np.isnan(value):
+        return "n/a"
+    if fmt == "%":
+        return f"{value * 100:.1f}%"
+    if fmt == "x":
+        return f"{value:.2f}x"
+    return f"{value:,.0f}"
+
+
+def _markdown_table(header: List[str], rows: List[List[str]]) -> str:
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    lines += ["| " + " | ".join(row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def render_financials(statements: Optional[FinancialStatements]) -> str:
+    """Markdown with the extracted line items and the computed ratios"""
+    if statements is None or not statements.periods:
+        return (
+            "## Computed Financial Ratios\n\n"
+            "No reported financial figures could be extracted from the research, so no ratios "
+            "were computed. Base the analysis on the figures quoted in the research."
+        )
+    periods, matrix = statement_matrix(statements)
+    table = compute_ratios(statements)
+    reported = [
+        [name.replace("_", " ").capitalize()] + [format_value(value, "") for value in matrix[:, i]]
+        for i, name in enumerate(COLUMNS)
+        if not np.isnan(matrix[:, i]).all()
+    ]
+    computed = [
+        [metric] + [format_value(value, fmt) for value in row]
+        for metric, fmt, row in zip(table.metrics, table.formats, table.values)
+        if not np.isnan(row).all()
+    ]
+    sections = [
+        "## Reported Figures",
+        f"{statements.company}, {statements.currency} {statements.unit}.",
+        _markdown_table(["Line item"] + periods, reported),
+        "## Computed Financial Ratios",
+        "Computed exactly from the reported figures above. Use these values as given; "
+        "do not recalculate them.",
+        _markdown_table(["Metric"] + periods, computed) if computed else "Too few figures to compute ratios.",
+    ]
+    return "\n\n".join(sections)
+
+
+class RatioEngine:
+    """Replaces the output of the extraction task with reported figures and computed ratios
+
+    attach() hooks the task's callback: the FinancialStatements parsed from
+    the task's raw JSON answer (None when it is not valid JSON) go through
+    compute_ratios(), and output.raw, the context later tasks see,
+    becomes the markdown tables of render_financials(). The task's output file
+    keeps the extracted JSON; with a path the tables are also written there,
+    and on_ratios receives the statements and ratios of every run that has some.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        on_ratios: Optional[Callable[[FinancialStatements, RatioTable], None]] = None,
+    ):
+        self.path = path
+        self.on_ratios = on_ratios
+        self.statements: Optional[FinancialStatements] = None
+        self.table: Optional[RatioTable] = None
+        self._attached: set = set()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def attach(self, task: Any) -> None:
+        if task.name in self._attached:
+            return
+        self._attached.add(task.name)
+        previous = task.callback
+
+        def callback(output):
+            self.apply(output)
+            if previous:
+                previous(output)
+
+        task.callback = callback
+        # A failed extraction has no ratios; release wait() instead of leaving it to time out
+        if hasattr(task, "on_error"):
+            task.on_error(lambda error: self._done.set())
+
+    def apply(self, output: Any) -> None:
+        statements = output.pydantic if isinstance(output.pydantic, FinancialStatements) else None
+        statements = statements or parse_statements(output.raw or "")
+        text = render_financials(statements)
+        with self._lock:
+            self.statements = statements
+            self.table = compute_ratios(statements) if statements and statements.periods else None
+        output.raw = text
+        if self.path:
+            with open(self.path, "w") as f:
+                f.write(text + "\n")
+        try:
+            if self.on_ratios and self.table is not None:
+                self.on_ratios(statements, self.table)
+        finally:
+            self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the extraction task has finished or failed; False on timeout"""
+        return self._done.wait(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Periods extracted, line items reported and ratios computed"""
+        with self._lock:
+            statements, table = self.statements, self.table
+        if statements is None or table is None:
+            return {"periods": 0, "line_items": 0, "ratios": 0}
+        _, matrix = statement_matrix(statements)
+        return {
+            "periods": len(table.periods),
+            "line_items": int(np.count_nonzero(~np.isnan(matrix[:, :len(LINE_ITEMS)]))),
+            "ratios": int(np.count_nonzero(~np.isnan(table.values))),
+        }
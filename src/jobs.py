@@ -0,0 +1,339 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+from cache import hash_key
+from limits import SharedPriority
+from runs import run_output_dir
+from telemetry import REGISTRY
+
+if TYPE_CHECKING:
+    from streaming import ReportStream
+
+# A completed run is handed to identical requests for this long; 0 only joins
+# runs still in progress
+JOB_REUSE_SECONDS = float(os.getenv("JOB_REUSE_SECONDS", 60 * 60))
+
+# Finished jobs, with their report stream and metrics, are dropped from the
+# manager after this long, or after JOB_REUSE_SECONDS if that is longer
+JOB_RETAIN_SECONDS = float(os.getenv("JOB_RETAIN_SECONDS", 60 * 60))
+
+
+@dataclass
+class Job:
+    """State of one background research run, updated by the crew callbacks"""
+    id: str
+    company: str
+    provider: str
+    model: str
+    output_dir: str
+    current_date: str = ""
+    key: str = ""
+    # Submissions served by this run and those withdrawn, see JobManager.submit
+    request_ids: Set[str] = field(default_factory=set, repr=False)
+    withdrawn_ids: Set[str] = field(default_factory=set, repr=False)
+    status: str = "queued"  # queued | running | complete | failed | cancelled
+    task_names: List[str] = field(default_factory=list)
+    dependencies: Dict[str, List[str]] = field(default_factory=dict)
+    completed_tasks: List[str] = field(default_factory=list)
+    last_step: str = ""
+    error: str = ""
+    llm_cache_stats: Optional[Dict[str, Any]] = None
+    compaction_stats: Optional[Dict[str, Any]] = None
+    checkpoint_stats: Optional[Dict[str, Any]] = None
+    retrieval_stats: Optional[Dict[str, Any]] = None
+    hedge_stats: Optional[Dict[str, Any]] = None
+    metrics: Optional[Dict[str, Any]] = None
+    report_stream: Optional["ReportStream"] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    priority: SharedPriority = field(default_factory=SharedPriority, repr=False)
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("complete", "failed", "cancelled")
+
+    @property
+    def requests(self) -> int:
+        """Submissions still waiting for this run"""
+        return len(self.request_ids)
+
+    @property
+    def progress(self) -> float:
+        """Fraction of tasks completed"""
+        if not self.task_names:
+            return 0.0
+        return len(self.completed_tasks) / len(self.task_names)
+
+    @property
+    def report_preview(self) -> str:
+        """Final report tokens streamed so far"""
+        return self.report_stream.text if self.report_stream else ""
+
+    def active_tasks(self) -> List[str]:
+        """Tasks whose inputs are ready but which have not finished yet"""
+        if self.status != "running":
+            return []
+        completed = set(self.completed_tasks)
+        return [
+            name for name in self.task_names
+            if name not in completed and set(self.dependencies.get(name, [])) <= completed
+        ]
+
+
+def describe_step(step: Any) -> str:
+    """One-line summary of a crewai step callback payload"""
+    tool = getattr(step, "tool", None)
+    if tool:
+        return f"Using {tool}"
+    thought = (getattr(step, "thought", "") or "").strip()
+    return thought.splitlines()[0][:120] if thought else "Thinking"
+
+
+class QueueFull(Exception):
+    """Raised by JobManager.submit when max_queued runs are already waiting"""
+
+
+def job_key(company: str, current_date: str, provider: str, model: str, **config: Any) -> str:
+    """Identity of a research run: identical keys produce the same research"""
+    return hash_key("job", " ".join(company.lower().split()), current_date, provider, model, config)
+
+
+class JobManager:
+    """Runs research crews on a bounded thread pool and tracks their progress
+
+    One manager is shared by every Streamlit session on the server, so several
+    runs can progress at once while each page only polls its own job.
+    Identical requests share one run (single flight), see submit(). With
+    max_queued, at most that many runs wait for a worker. Finished jobs are
+    forgotten retain_seconds after they finish (never before reuse_seconds).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        reuse_seconds: float = JOB_REUSE_SECONDS,
+        max_queued: Optional[int] = None,
+        retain_seconds: float = JOB_RETAIN_SECONDS,
+    ):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="research")
+        self.reuse_seconds = reuse_seconds
+        self.retain_seconds = max(retain_seconds, reuse_seconds)
+        self.max_queued = max_queued
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        company: str,
+        provider: str,
+        model: str,
+        api_key: Optional[str] = None,
+        parallel: bool = False,
+        llm_cache: bool = False,
+        compact_context: bool = False,
+        resume: bool = False,
+        retrieval: bool = False,
+        routing: bool = False,
+        hedge: Optional[str] = None,
+        hedge_api_key: Optional[str] = None,
+        priority: str = "interactive",
+        request_id: Optional[str] = None,
+    ) -> Job:
+        """Queue a research run and return its job immediately
+
+        A request identical to a queued or running one (same company up to
+        case and spacing, date, provider, model, pipeline options and API
+        keys) gets that job instead of a new run, and so does one matching a
+        run that completed within reuse_seconds; an interactive request raises
+        a batch run's priority. Failed and cancelled runs are never reused.
+        Raises QueueFull when a new run would exceed max_queued.
+
+        With routing=True tasks and agents run on the models in llm.ROUTING_CONFIG.
+        hedge is an optional provider/model that slow calls are duplicated to.
+        priority ("interactive" or "batch") orders the run's requests in the
+        process-wide limiter queues. request_id identifies this submission to
+        cancel(); a random one is used when none is given.
+        """
+        request_id = request_id or uuid.uuid4().hex
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        key = job_key(
+            company, current_date, provider, model,
+            parallel=parallel, llm_cache=llm_cache, compact_context=compact_context, resume=resume,
+            retrieval=retrieval, routing=routing, hedge=hedge,
+            # Only callers with the same keys share a run, which is served with them
+            credentials=hash_key("credentials", api_key or "", hedge_api_key or ""),
+        )
+        with self._lock:
+            self._evict()
+            existing = self._by_key.get(key)
+            if existing and self._reusable(existing):
+                existing.request_ids.add(request_id)
+                existing.priority.raise_to(priority)
+                REGISTRY.inc("research_jobs_coalesced_total", status=existing.status)
+                return existing
+            if self.max_queued is not None and self._queued() >= self.max_queued:
+                raise QueueFull(f"{self.max_queued} research runs are already queued")
+
+            job_id = uuid.uuid4().hex[:12]
+            job = Job(
+                id=job_id,
+                company=company,
+                provider=provider,
+                model=model,
+                output_dir=run_output_dir(company),
+                current_date=current_date,
+                key=key,
+                priority=SharedPriority(priority),
+                request_ids={request_id},
+            )
+            self._jobs[job_id] = job
+            self._by_key[key] = job
+        self._executor.submit(
+            self._run, job, api_key, parallel, llm_cache, compact_context, resume, retrieval, routing,
+            hedge, hedge_api_key,
+        )
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def _evict(self) -> None:
+        """Drop jobs that finished more than retain_seconds ago"""
+        cutoff = time.time() - self.retain_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.done and job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+
+    def queued(self) -> int:
+        """Runs waiting for a worker"""
+        with self._lock:
+            return self._queued()
+
+    def _queued(self) -> int:
+        return sum(job.status == "queued" for job in self._jobs.values())
+
+    def cancel(self, job_id: str, request_id: str) -> Optional[Job]:
+        """Withdraw one submission of a job; the run stops once none is left
+
+        Withdrawing a request_id again, or one the job never had, changes
+        nothing. A queued run is dropped before it starts. A running one
+        stops at its next LLM call (see llm.CancellableLLM). Returns None for
+        unknown jobs.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done or request_id not in job.request_ids:
+                return job
+            job.request_ids.discard(request_id)
+            job.withdrawn_ids.add(request_id)
+            if job.request_ids:
+                return job
+            job.cancel_event.set()
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+            if job.status == "queued":
+                job.finished_at = time.time()
+                job.status = "cancelled"
+        return job
+
+    def _reusable(self, job: Job) -> bool:
+        if not job.done:
+            return True
+        return (
+            job.status == "complete"
+            and job.finished_at is not None
+            and time.time() - job.finished_at < self.reuse_seconds
+        )
+
+    def _run(
+        self,
+        job: Job,
+        api_key: Optional[str],
+        parallel: bool,
+        llm_cache: bool,
+        compact_context: bool,
+        resume: bool,
+        retrieval: bool,
+        routing: bool,
+        hedge: Optional[str],
+        hedge_api_key: Optional[str],
+    ) -> None:
+        with self._lock:
+            if job.cancel_event.is_set():
+                return
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            # crewai is imported by the first run, not when the app loads
+            from crew import ResearchCrew
+            from llm import CachedLLM, HedgedLLM, create_llm, create_routed_llm, find_wrapper, load_routes
+
+            llm_instance = create_llm(
+                provider=job.provider,
+                model=job.model,
+                api_key=api_key,
+                cache=llm_cache,
+                hedge=hedge,
+                hedge_api_key=hedge_api_key,
+            )
+            routed_llm = (
+                create_routed_llm(llm_instance, load_routes(), {job.provider: api_key}, cache=llm_cache)
+                if routing else llm_instance
+            )
+            research_crew = ResearchCrew(
+                llm_instance=routed_llm,
+                parallel=parallel,
+                output_dir=job.output_dir,
+                task_callback=lambda output: job.completed_tasks.append(output.name),
+                step_callback=lambda step: setattr(job, "last_step", describe_step(step)),
+                stream_report=True,
+                compact_context=compact_context,
+                resume=resume,
+                retrieval=retrieval,
+                priority=job.priority,
+                cancel_event=job.cancel_event,
+            )
+            job.report_stream = research_crew.report_stream
+            job.dependencies = research_crew.dependencies
+            job.task_names = list(research_crew.dependencies)
+
+            try:
+                research_crew.crew().kickoff(inputs={
+                    "company": job.company,
+                    "current_date": job.current_date,
+                })
+            finally:
+                job.metrics = research_crew.write_metrics()
+                job.checkpoint_stats = research_crew.checkpoints.stats()
+
+            if isinstance(llm_instance, CachedLLM):
+                job.llm_cache_stats = llm_instance.stats()
+            # The crew's own copy, counting only this run's calls
+            hedged = find_wrapper(research_crew.llm_instance, HedgedLLM)
+            if hedged:
+                job.hedge_stats = hedged.stats()
+            if research_crew.research_index is not None:
+                job.retrieval_stats = research_crew.research_index.stats()
+            if research_crew.compactor:
+                job.compaction_stats = research_crew.compactor.stats()
+            status = "complete"
+        except Exception as e:
+            job.error = str(e)
+            status = "cancelled" if job.cancel_event.is_set() else "failed"
+        with self._lock:
+            # finished_at first: a done job always has one (see _reusable and _evict)
+            job.finished_at = time.time()
+            job.status = status
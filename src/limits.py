@@ -0,0 +1,250 @@
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from compaction import estimate_tokens as estimate_text_tokens
+from telemetry import REGISTRY
+
+# Queue order when a resource is saturated: interactive runs (app, single CLI
+# runs) are served before batch runs, and FIFO within a priority
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# Default caps per resource, 0 meaning unlimited. Each can be overridden with
+# LIMIT_<RESOURCE>_CONCURRENCY, LIMIT_<RESOURCE>_RPM and LIMIT_<RESOURCE>_TPM.
+# LLM resources are named after the provider, so every model of a provider
+# shares its cap; the cloud rates match the providers' entry tiers.
+DEFAULT_LIMITS: Dict[str, Dict[str, float]] = {
+    "ollama": {"concurrency": 4, "rpm": 0, "tpm": 0},
+    "openai": {"concurrency": 16, "rpm": 500, "tpm": 0},
+    "anthropic": {"concurrency": 8, "rpm": 50, "tpm": 0},
+    "groq": {"concurrency": 8, "rpm": 30, "tpm": 6000},
+    "serper": {"concurrency": 5, "rpm": 0, "tpm": 0},
+    "scrape": {"concurrency": 8, "rpm": 0, "tpm": 0},
+}
+FALLBACK_LIMITS = {"concurrency": 8, "rpm": 0, "tpm": 0}
+
+
+class SharedPriority:
+    """Priority of a run that can be raised while the run is in progress
+
+    Accepted wherever a priority name is; every limited LLM and tool of the
+    run holds the same instance, so raise_to() affects their next requests.
+    """
+
+    def __init__(self, name: str = "interactive"):
+        self.name = name
+
+    def raise_to(self, name: str) -> None:
+        """Switch to name if it is served before the current priority"""
+        if PRIORITIES.get(name, len(PRIORITIES)) < PRIORITIES.get(self.name, len(PRIORITIES)):
+            self.name = name
+
+    def __str__(self) -> str:
+        return self.name
+
+
+# Request and token buckets hold this many seconds of their rate, so short
+# bursts go through at once and longer ones are spread out
+LIMIT_BURST_SECONDS = float(os.getenv("LIMIT_BURST_SECONDS", 10))
+
+
+def estimate_tokens(value: Any) -> int:
+    """Rough token count of a prompt or response, counted as compaction counts text"""
+    if isinstance(value, str):
+        return estimate_text_tokens(value)
+    if isinstance(value, list):
+        return sum(estimate_tokens(item.get("content") if isinstance(item, dict) else item) for item in value)
+    return 0
+
+
+class TokenBucket:
+    """Refills at rate_per_minute up to capacity; take() blocks until enough is left
+
+    An amount above capacity is granted once the bucket is full and leaves it
+    in debt, so one large request delays the following ones instead of
+    waiting forever.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity or max(1.0, self.rate * LIMIT_BURST_SECONDS)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, amount: float = 1.0) -> float:
+        """Remove amount, waiting for the refill if needed; returns seconds waited"""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                needed = min(amount, self.capacity)
+                if self._level >= needed:
+                    self._level -= amount
+                    return now - started
+                delay = (needed - self._level) / self.rate
+            time.sleep(delay)
+
+    def charge(self, amount: float) -> None:
+        """Remove amount without waiting, e.g. tokens only known after a call"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level -= amount
+
+
+class PrioritySemaphore:
+    """Semaphore whose free slots go to the waiter with the best priority first"""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.active = 0
+        self._waiters: List[tuple] = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self, priority: int = 0) -> None:
+        with self._cond:
+            entry = (priority, next(self._order))
+            heapq.heappush(self._waiters, entry)
+            while self.active >= self.slots or self._waiters[0] != entry:
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self.active += 1
+            # The next waiter may fit into a slot that is still free
+            self._cond.notify_all()
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+
+class Limiter:
+    """Concurrency cap plus request and token rates for one resource
+
+    Callers queue for a slot by priority, then take a request and their
+    estimated tokens from the buckets while holding it. Waiting happens in
+    front of the resource, so a saturated provider serves a steady stream of
+    requests instead of a burst of 429s and retries.
+    """
+
+    def __init__(self, name: str, concurrency: int = 0, rpm: float = 0, tpm: float = 0):
+        self.name = name
+        self.concurrency = concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self._slots = PrioritySemaphore(concurrency) if concurrency > 0 else None
+        self._requests = TokenBucket(rpm) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._counts = {"acquired": 0, "waited": 0, "wait_seconds": 0.0}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, priority: Any = "interactive", tokens: int = 0) -> Iterator[None]:
+        """Hold one unit of the resource for the duration of the block
+
+        priority is a PRIORITIES name or a SharedPriority.
+        """
+        priority = str(priority)
+        started = time.monotonic()
+        if self._slots:
+            self._slots.acquire(PRIORITIES.get(priority, len(PRIORITIES)))
+        try:
+            if self._requests:
+                self._requests.take()
+            if self._tokens and tokens:
+                self._tokens.take(tokens)
+            self._record(priority, time.monotonic() - started)
+            yield
+        finally:
+            if self._slots:
+                self._slots.release()
+
+    def charge(self, tokens: int) -> None:
+        """Count tokens against the token rate after the fact"""
+        if self._tokens and tokens:
+            self._tokens.charge(tokens)
+
+    def _record(self, priority: str, waited: float) -> None:
+        with self._lock:
+            self._counts["acquired"] += 1
+            self._counts["waited"] += int(waited > 0.01)
+            self._counts["wait_seconds"] += waited
+        REGISTRY.inc("research_limiter_acquired_total", resource=self.name, priority=priority)
+        if waited > 0.01:
+            REGISTRY.inc("research_limiter_wait_seconds_total", waited, resource=self.name, priority=priority)
+
+    def stats(self) -> Dict[str, Any]:
+        """Configured limits, current load and the time callers spent queued"""
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "concurrency": self.concurrency,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "active": self._slots.active if self._slots else 0,
+            "queued": self._slots.waiting if self._slots else 0,
+            **counts,
+            "wait_seconds": round(counts["wait_seconds"], 3),
+        }
+
+
+class Governor:
+    """Process-wide limiters, one per provider or tool, created on first use
+
+    Every run in the process, and every Streamlit session, goes through the
+    same limiters. Batch workers are separate processes; share() gives each
+    of them its part of the limits.
+    """
+
+    def __init__(self):
+        self.processes = 1
+        self._limiters: Dict[str, Limiter] = {}
+        self._lock = threading.Lock()
+
+    def share(self, processes: int) -> None:
+        """Split every limit evenly between this and processes - 1 sibling processes"""
+        with self._lock:
+            self.processes = max(1, processes)
+            self._limiters.clear()
+
+    def limiter(self, name: str) -> Limiter:
+        with self._lock:
+            if name not in self._limiters:
+                self._limiters[name] = Limiter(name, **self._limits(name))
+            return self._limiters[name]
+
+    def _limits(self, name: str) -> Dict[str, Any]:
+        defaults = DEFAULT_LIMITS.get(name, FALLBACK_LIMITS)
+        limits = {
+            key: float(os.getenv(f"LIMIT_{name.upper()}_{key.upper()}", defaults[key]))
+            for key in ("concurrency", "rpm", "tpm")
+        }
+        concurrency = limits.pop("concurrency")
+        return {
+            "concurrency": int(math.ceil(concurrency / self.processes)) if concurrency > 0 else 0,
+            **{key: value / self.processes for key, value in limits.items()},
+        }
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """stats() of every limiter used so far"""
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {name: limiter.stats() for name, limiter in sorted(limiters.items())}
+
+
+GOVERNOR = Governor()
@@ -0,0 +1,759 @@
+import contextvars
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+from crewai import LLM
+from crewai.llms.base_llm import BaseLLM
+
+from cache import DiskCache, hash_key, shared_cache
+from limits import GOVERNOR, estimate_tokens
+from telemetry import REGISTRY
+
+OLLAMA_BASE_URL = "http://localhost:11434"
+DEFAULT_PROVIDER = "ollama"
+DEFAULT_MODEL = "llama3.1:8b"
+
+# Shared clients: at most LLM_POOL_MAX_SIZE, dropped after LLM_POOL_IDLE_SECONDS unused
+LLM_POOL_MAX_SIZE = int(os.getenv("LLM_POOL_MAX_SIZE", 16))
+LLM_POOL_IDLE_SECONDS = float(os.getenv("LLM_POOL_IDLE_SECONDS", 15 * 60))
+
+# Opt-in response cache for deterministic (temperature 0) calls
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 60 * 60))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+
+# Sampling parameters that change the response and therefore the cache key
+SAMPLING_PARAMS = ("temperature", "top_p", "max_tokens", "max_completion_tokens", "seed", "stop")
+
+# Per-task and per-agent models, see RouterLLM (relative to src/)
+ROUTING_CONFIG = "config/routing.yaml"
+
+# Hedged calls: a duplicate goes to the hedge model once the primary is slower
+# than this percentile of its recent latencies. Until HEDGE_MIN_SAMPLES calls
+# have been timed, HEDGE_INITIAL_DELAY seconds is used instead.
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 95))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+HEDGE_INITIAL_DELAY = float(os.getenv("HEDGE_INITIAL_DELAY", 30))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", 200))
+
+
+class DelegatingLLM(BaseLLM):
+    """LLM that forwards everything to a wrapped LLM
+
+    Subclasses override call() to add behaviour around the inner call; every
+    other attribute, including stop words set by agents, lives on the inner LLM.
+    """
+
+    def __init__(self, inner: BaseLLM):
+        self.inner = inner
+        super().__init__(
+            model=inner.model,
+            temperature=inner.temperature,
+            api_key=inner.api_key,
+            base_url=inner.base_url,
+            provider=inner.provider,
+            stop=inner.stop,
+        )
+        self.is_litellm = inner.is_litellm
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    @property
+    def stop(self) -> List[str]:
+        return self.inner.stop
+
+    @stop.setter
+    def stop(self, value: List[str]) -> None:
+        for llm in self._llms():
+            llm.stop = value
+
+    @property
+    def stream(self) -> bool:
+        return getattr(self.inner, "stream", False)
+
+    @stream.setter
+    def stream(self, value: bool) -> None:
+        self.inner.stream = value
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        return self.inner.call(
+            messages,
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+            from_task=from_task,
+            from_agent=from_agent,
+            response_model=response_model,
+        )
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        return self.inner.get_token_usage_summary()
+
+    def _llms(self) -> List[BaseLLM]:
+        """Every LLM this wrapper may call"""
+        return [self.inner]
+
+    def map_inner(self, fn: Callable[[BaseLLM], BaseLLM]) -> "DelegatingLLM":
+        """Shallow copy of this wrapper with every wrapped LLM replaced by fn(llm)"""
+        wrapper = copy.copy(self)
+        wrapper.inner = fn(self.inner)
+        return wrapper
+
+
+class RunCancelled(Exception):
+    """Raised instead of making an LLM call once the run has been cancelled"""
+
+
+class CancellableLLM(DelegatingLLM):
+    """Refuses new calls once cancel_event is set
+
+    Cancellation is cooperative: a call in flight finishes, and the next call
+    of any task raises RunCancelled, which fails the kickoff.
+    """
+
+    def __init__(self, inner: BaseLLM, cancel_event: threading.Event):
+        super().__init__(inner)
+        self.cancel_event = cancel_event
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        if self.cancel_event.is_set():
+            raise RunCancelled("Run cancelled")
+        return super().call(
+            messages, tools, callbacks, available_functions, from_task, from_agent, response_model
+        )
+
+
+class CachedLLM(DelegatingLLM):
+    """Serves exact repeats of deterministic calls from a response cache
+
+    The key covers provider, model, the full message list, tool schemas and the
+    sampling parameters. Only temperature-0 calls without callable tools are
+    cached, since anything else is not expected to repeat its answer.
+    """
+
+    def __init__(self, inner: BaseLLM, cache: Optional[DiskCache] = None):
+        super().__init__(inner)
+        self.cache = cache or shared_cache("llm", LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES)
+        # Shared with copies made by with_streaming() so stats cover every call;
+        # concurrent tasks update them from several threads
+        self._counts = {"hits": 0, "misses": 0}
+        self._counts_lock = threading.Lock()
+
+    def _key(self, messages, tools, response_model) -> str:
+        sampling = {name: getattr(self.inner, name, None) for name in SAMPLING_PARAMS}
+        return hash_key(
+            "llm",
+            self.inner.provider,
+            self.inner.model,
+            messages,
+            tools,
+            response_model.__name__ if response_model else None,
+            sampling,
+        )
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        if self.inner.temperature != 0 or available_functions:
+            return super().call(
+                messages, tools, callbacks, available_functions, from_task, from_agent, response_model
+            )
+
+        key = self._key(messages, tools, response_model)
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self._counts_lock:
+                self._counts["hits"] += 1
+            return cached
+
+        with self._counts_lock:
+            self._counts["misses"] += 1
+        result = super().call(
+            messages, tools, callbacks, available_functions, from_task, from_agent, response_model
+        )
+        if isinstance(result, str):
+            self.cache.set(key, result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache hits, misses and hit rate of the calls made through this LLM"""
+        with self._counts_lock:
+            hits, misses = self._counts["hits"], self._counts["misses"]
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+
+class MeteredLLM(DelegatingLLM):
+    """Times every call and reports its token usage to a run's metrics
+
+    Each call goes through a shallow copy of the inner client with its own
+    token counters. The copy shares the client's HTTP connections, so usage is
+    attributed to this run exactly even while other runs use the same pooled
+    client. get_token_usage_summary() covers only the calls made through here.
+    """
+
+    def __init__(self, inner: BaseLLM, recorder: Any):
+        super().__init__(inner)
+        self.recorder = recorder
+        # Shared with copies made by with_streaming() so usage covers every call
+        self._usage_lock = threading.Lock()
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        client = copy.copy(self.inner)
+        client._token_usage = dict.fromkeys(self._token_usage, 0)
+        task = getattr(from_task, "name", None)
+        agent = (getattr(from_agent, "role", None) or "").strip() or None
+
+        start = time.perf_counter()
+        try:
+            result = client.call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                response_model=response_model,
+            )
+        except Exception:
+            self.recorder.record_llm_call(
+                task, agent, time.perf_counter() - start, failed=True, model=model_name(self.inner)
+            )
+            raise
+        elapsed = time.perf_counter() - start
+
+        usage = client._token_usage
+        with self._usage_lock:
+            for key, value in usage.items():
+                self._token_usage[key] += value
+        self.recorder.record_llm_call(
+            task, agent, elapsed, usage["prompt_tokens"], usage["completion_tokens"],
+            model=model_name(self.inner),
+        )
+        return result
+
+    def get_token_usage_summary(self):
+        return BaseLLM.get_token_usage_summary(self)
+
+
+class RateLimitedLLM(DelegatingLLM):
+    """Holds a slot of its provider's limiter (limits.GOVERNOR) for every call
+
+    The estimated prompt tokens are taken from the provider's token rate
+    before the call and the response's tokens are charged after it. priority
+    is "interactive" or "batch", or a limits.SharedPriority, and orders the
+    queue when the provider is saturated.
+    """
+
+    def __init__(self, inner: BaseLLM, priority: Any = "interactive"):
+        super().__init__(inner)
+        self.priority = priority
+        self.resource = model_name(inner).partition("/")[0]
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        limiter = GOVERNOR.limiter(self.resource)
+        with limiter.slot(self.priority, estimate_tokens(messages)):
+            result = super().call(
+                messages, tools, callbacks, available_functions, from_task, from_agent, response_model
+            )
+        limiter.charge(estimate_tokens(result))
+        return result
+
+
+class RouterLLM(DelegatingLLM):
+    """Sends each call to the LLM configured for its task or agent
+
+    task_routes are keyed by task name and take precedence over agent_routes,
+    keyed by agent name (the agents.yaml key, i.e. the role in snake_case).
+    Calls matching neither go to inner, the run's own model. Stop words set
+    by an agent apply to every route.
+    """
+
+    def __init__(
+        self,
+        inner: BaseLLM,
+        task_routes: Optional[Dict[str, BaseLLM]] = None,
+        agent_routes: Optional[Dict[str, BaseLLM]] = None,
+    ):
+        super().__init__(inner)
+        self.task_routes = dict(task_routes or {})
+        self.agent_routes = dict(agent_routes or {})
+
+    def route(self, task: Optional[str] = None, agent: Optional[str] = None) -> BaseLLM:
+        """LLM serving the calls of a task (by name) or agent (by role)"""
+        if task in self.task_routes:
+            return self.task_routes[task]
+        return self.agent_routes.get("_".join((agent or "").lower().split()), self.inner)
+
+    def _llms(self) -> List[BaseLLM]:
+        # Also called by the stop setter while BaseLLM.__init__ runs, before routes exist
+        routes = self.__dict__.get("task_routes", {}), self.__dict__.get("agent_routes", {})
+        return [self.inner] + [llm for table in routes for llm in table.values()]
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        llm = self.route(getattr(from_task, "name", None), getattr(from_agent, "role", None))
+        return llm.call(
+            messages,
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+            from_task=from_task,
+            from_agent=from_agent,
+            response_model=response_model,
+        )
+
+    def map_inner(self, fn: Callable[[BaseLLM], BaseLLM]) -> "RouterLLM":
+        wrapper = super().map_inner(fn)
+        wrapper.task_routes = {name: fn(llm) for name, llm in self.task_routes.items()}
+        wrapper.agent_routes = {name: fn(llm) for name, llm in self.agent_routes.items()}
+        return wrapper
+
+    def describe(self) -> Dict[str, str]:
+        """provider/model serving each routed task and agent"""
+        routes = {**self.agent_routes, **self.task_routes}
+        return {name: model_name(llm) for name, llm in routes.items()}
+
+
+# Hedged calls wait on futures; abandoned calls keep their thread until they return
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+
+class HedgedLLM(DelegatingLLM):
+    """Duplicates slow calls to a second model and returns whichever answers first
+
+    A call that has not returned after the hedge threshold, the given
+    percentile of the primary's recent latencies, is sent to hedge as well.
+    The losing request is abandoned: its answer is dropped, though the HTTP
+    call itself cannot be interrupted and still finishes in the background.
+    Streaming calls are never hedged, since both answers would stream into
+    the same output.
+
+    Latencies live on the instance, which the client pool keeps across runs,
+    so every run hedges at the threshold learned so far. Counts are shared
+    with copies too, except those made by run_scoped(); stats() reports the
+    hedge rate, wins and latency saved.
+    """
+
+    def __init__(self, inner: BaseLLM, hedge: BaseLLM, percentile: float = HEDGE_PERCENTILE):
+        super().__init__(inner)
+        self.hedge = hedge
+        self.percentile = percentile
+        # Shared with the copies made by metered() and with_streaming()
+        self._latencies: deque = deque(maxlen=HEDGE_WINDOW)
+        self._counts = self._new_counts()
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def _new_counts() -> Dict[str, float]:
+        return {"calls": 0, "hedged": 0, "hedge_wins": 0, "saved_seconds": 0.0}
+
+    def with_own_counts(self) -> "HedgedLLM":
+        """Copy that counts only its own calls (and those of its copies), sharing the latencies"""
+        wrapper = copy.copy(self)
+        wrapper._counts = self._new_counts()
+        return wrapper
+
+    def _llms(self) -> List[BaseLLM]:
+        # Also called by the stop setter while BaseLLM.__init__ runs, before hedge exists
+        return [self.inner] + ([self.__dict__["hedge"]] if "hedge" in self.__dict__ else [])
+
+    def map_inner(self, fn: Callable[[BaseLLM], BaseLLM]) -> "HedgedLLM":
+        wrapper = super().map_inner(fn)
+        wrapper.hedge = fn(self.hedge)
+        return wrapper
+
+    def threshold(self) -> float:
+        """Seconds to wait for the primary before hedging"""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_INITIAL_DELAY
+        return latencies[min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)]
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        kwargs = {
+            "tools": tools,
+            "callbacks": callbacks,
+            "available_functions": available_functions,
+            "from_task": from_task,
+            "from_agent": from_agent,
+            "response_model": response_model,
+        }
+        if self.stream:
+            return self.inner.call(messages, **kwargs)
+
+        start = time.perf_counter()
+        outcome = {"hedge_won_after": None}
+        primary = self._submit(self.inner, messages, kwargs)
+        primary.add_done_callback(lambda future: self._primary_done(future, start, outcome))
+        with self._stats_lock:
+            self._counts["calls"] += 1
+        try:
+            return primary.result(timeout=self.threshold())
+        except FutureTimeout:
+            pass
+
+        with self._stats_lock:
+            self._counts["hedged"] += 1
+        REGISTRY.inc("research_llm_hedged_calls_total", model=model_name(self.inner), hedge=model_name(self.hedge))
+        hedge = self._submit(self.hedge, messages, kwargs)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                if future is hedge:
+                    self._hedge_won(start, outcome)
+                return future.result()
+        raise primary.exception()
+
+    def _submit(self, llm: BaseLLM, messages, kwargs: Dict[str, Any]) -> Future:
+        # Each thread gets its own copy of the caller's context (crewai keeps event scope there)
+        return _hedge_executor.submit(contextvars.copy_context().run, llm.call, messages, **kwargs)
+
+    def _primary_done(self, future: Future, start: float, outcome: Dict[str, Optional[float]]) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self._latencies.append(elapsed)
+            won_after = outcome["hedge_won_after"]
+            if won_after is not None:
+                saved = elapsed - won_after
+                self._counts["saved_seconds"] += saved
+        if won_after is not None:
+            REGISTRY.inc("research_llm_hedge_saved_seconds_total", saved,
+                         model=model_name(self.inner), hedge=model_name(self.hedge))
+
+    def _hedge_won(self, start: float, outcome: Dict[str, Optional[float]]) -> None:
+        with self._stats_lock:
+            outcome["hedge_won_after"] = time.perf_counter() - start
+            self._counts["hedge_wins"] += 1
+        REGISTRY.inc("research_llm_hedge_wins_total", model=model_name(self.inner), hedge=model_name(self.hedge))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge rate, hedge wins and latency saved over the calls counted by this LLM
+
+        saved_seconds counts a hedge win once the abandoned primary call has
+        returned, as the difference between both latencies.
+        """
+        threshold = self.threshold()
+        with self._stats_lock:
+            counts = dict(self._counts)
+            samples = len(self._latencies)
+        return {
+            **counts,
+            "saved_seconds": round(counts["saved_seconds"], 3),
+            "hedge_rate": counts["hedged"] / counts["calls"] if counts["calls"] else 0.0,
+            "threshold_seconds": round(threshold, 3),
+            "latency_samples": samples,
+        }
+
+
+def resolve_llm(llm: BaseLLM, task: Optional[str] = None, agent: Optional[str] = None) -> BaseLLM:
+    """Provider client that serves a task's calls, below every wrapper"""
+    while isinstance(llm, DelegatingLLM):
+        llm = llm.route(task, agent) if isinstance(llm, RouterLLM) else llm.inner
+    return llm
+
+
+def find_wrapper(llm: BaseLLM, kind: type) -> Optional[BaseLLM]:
+    """First wrapper of the given type on the path to an LLM's default client"""
+    while isinstance(llm, DelegatingLLM):
+        if isinstance(llm, kind):
+            return llm
+        llm = llm.inner
+    return None
+
+
+def model_name(llm: BaseLLM) -> str:
+    """provider/model of the client behind an LLM"""
+    client = resolve_llm(llm)
+    # LiteLLM-backed clients keep the prefix in model, native ones in provider
+    if "/" in client.model or not client.provider:
+        return client.model
+    return f"{client.provider}/{client.model}"
+
+
+def metered(llm: BaseLLM, recorder: Any) -> BaseLLM:
+    """Copy of an LLM whose real provider calls are reported to recorder
+
+    The meter sits directly around the provider client, below wrappers such as
+    CachedLLM, so answers served from a cache are not counted as LLM calls.
+    """
+    if isinstance(llm, DelegatingLLM):
+        return llm.map_inner(lambda inner: metered(inner, recorder))
+    return MeteredLLM(llm, recorder)
+
+
+def limited(llm: BaseLLM, priority: Any = "interactive") -> BaseLLM:
+    """Copy of an LLM whose provider calls queue for their provider's limiter
+
+    Like the meter, the limiter sits around each provider client, so cached
+    answers skip the queue and every route or hedge model is limited by its
+    own provider.
+    """
+    if isinstance(llm, DelegatingLLM):
+        return llm.map_inner(lambda inner: limited(inner, priority))
+    return RateLimitedLLM(llm, priority)
+
+
+def run_scoped(llm: BaseLLM) -> BaseLLM:
+    """Copy of an LLM whose hedge counts cover only the calls made through it
+
+    Pooled HedgedLLMs serve concurrent runs; each run wraps its own copy so
+    its stats() are not mixed with other runs' calls.
+    """
+    if isinstance(llm, HedgedLLM):
+        return llm.with_own_counts().map_inner(run_scoped)
+    if isinstance(llm, DelegatingLLM):
+        return llm.map_inner(run_scoped)
+    return llm
+
+
+def with_streaming(llm: BaseLLM) -> BaseLLM:
+    """Copy of an LLM that streams its responses, leaving the original untouched"""
+    if isinstance(llm, DelegatingLLM):
+        return llm.map_inner(with_streaming)
+    streaming = copy.copy(llm)
+    streaming.stream = True
+    return streaming
+
+
+def api_key_fingerprint(api_key: Optional[str]) -> str:
+    """Short hash that tells API keys apart without keeping them in pool keys"""
+    if not api_key:
+        return ""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+class LLMPool:
+    """Bounded pool of shared LLM clients with idle eviction
+
+    Clients are keyed by provider, model, base URL, API-key fingerprint and
+    sampling parameters. Reusing one client per key keeps its HTTP session
+    and connection pool warm across runs instead of re-doing TLS and auth
+    handshakes for every kickoff.
+    """
+
+    def __init__(self, max_size: int = LLM_POOL_MAX_SIZE, idle_seconds: float = LLM_POOL_IDLE_SECONDS):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._clients: "OrderedDict[Tuple, Tuple[BaseLLM, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def get(self, key: Tuple, factory: Callable[[], BaseLLM]) -> BaseLLM:
+        """Shared client for key, built with factory on first use"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.pop(key, None)
+            if entry is not None:
+                client = entry[0]
+                self.reused += 1
+            else:
+                client = factory()
+                self.created += 1
+            self._clients[key] = (client, now)
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+        return client
+
+    def _evict_idle(self, now: float) -> None:
+        for key in [k for k, (_, used) in self._clients.items() if now - used > self.idle_seconds]:
+            del self._clients[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"clients": len(self._clients), "created": self.created, "reused": self.reused}
+
+
+_pool = LLMPool()
+
+
+def _build_llm(provider: str, model: str, api_key: Optional[str], base_url: Optional[str], params: Dict[str, Any]) -> LLM:
+    """Construct a new client for a provider"""
+    if provider == "ollama":
+        return LLM(
+            model=f"ollama/{model}",
+            base_url=base_url or OLLAMA_BASE_URL,
+            **params
+        )
+    return LLM(
+        model=f"{provider}/{model}",
+        api_key=api_key,
+        base_url=base_url,
+        **params
+    )
+
+
+def _pooled(
+    provider: str, model: str, api_key: Optional[str], base_url: Optional[str], params: Dict[str, Any]
+) -> Tuple[Tuple, BaseLLM]:
+    """Pool key and shared client for a provider and model"""
+    if provider not in ("ollama", "openai", "anthropic", "groq"):
+        provider, model, api_key, base_url = DEFAULT_PROVIDER, DEFAULT_MODEL, None, None
+    key = (provider, model, base_url, api_key_fingerprint(api_key), tuple(sorted(params.items())))
+    return key, _pool.get(key, lambda: _build_llm(provider, model, api_key, base_url, params))
+
+
+def create_llm(
+    provider: str,
+    model: str,
+    api_key: Optional[str] = None,
+    cache: bool = False,
+    base_url: Optional[str] = None,
+    hedge: Optional[str] = None,
+    hedge_api_key: Optional[str] = None,
+) -> BaseLLM:
+    """Create LLM instance based on provider and model
+
+    Clients come from the shared LLMPool, so runs with the same provider,
+    model, endpoint and key reuse one client and its connections. Unknown
+    providers fall back to the default Ollama model.
+
+    With cache=True the LLM runs at temperature 0 and exact repeats of a call
+    are answered from the shared response cache (see CachedLLM).
+
+    With hedge="provider/model", calls slower than usual are duplicated to
+    that model and the first answer wins (see HedgedLLM). The hedged client is
+    pooled too, so its latency history carries over between runs.
+    """
+    params = {"temperature": 0} if cache else {}
+    key, llm = _pooled(provider, model, api_key, base_url, params)
+    if hedge:
+        hedge_provider, _, hedge_model = hedge.partition("/")
+        hedge_key, hedge_llm = _pooled(hedge_provider, hedge_model, hedge_api_key, None, params)
+        llm = _pool.get(("hedged", key, hedge_key), lambda: HedgedLLM(llm, hedge_llm))
+    return CachedLLM(llm) if cache else llm
+
+
+def load_routes(path: str = ROUTING_CONFIG) -> Dict[str, Dict[str, str]]:
+    """Task and agent routes of a routing file, each name mapped to provider/model"""
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    return {
+        "tasks": dict(config.get("tasks") or {}),
+        "agents": dict(config.get("agents") or {}),
+    }
+
+
+def create_routed_llm(
+    default: BaseLLM,
+    routes: Dict[str, Dict[str, str]],
+    api_keys: Optional[Dict[str, str]] = None,
+    cache: bool = False,
+) -> BaseLLM:
+    """RouterLLM that runs the routed tasks and agents on their own models
+
+    Each provider/model in routes gets a pooled client from create_llm().
+    Cloud providers use the key in api_keys or <PROVIDER>_API_KEY; a route to
+    a provider without a key is dropped and its calls stay on default.
+    """
+    api_keys = api_keys or {}
+    clients: Dict[str, BaseLLM] = {}
+
+    def client(target: str) -> Optional[BaseLLM]:
+        provider, _, model = target.partition("/")
+        api_key = api_keys.get(provider) or os.getenv(f"{provider.upper()}_API_KEY")
+        if provider != "ollama" and not api_key:
+            return None
+        if target not in clients:
+            clients[target] = create_llm(provider, model, api_key=api_key, cache=cache)
+        return clients[target]
+
+    def build(table: Dict[str, str]) -> Dict[str, BaseLLM]:
+        built = {name: client(target) for name, target in table.items()}
+        return {name: llm for name, llm in built.items() if llm is not None}
+
+    return RouterLLM(default, build(routes.get("tasks", {})), build(routes.get("agents", {})))
+
+
+def pool_stats() -> Dict[str, int]:
+    """Size of the shared client pool and how often clients were reused"""
+    return _pool.stats()
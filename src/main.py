@@ -1,27 +1,307 @@
 #!/usr/bin/env python
 # src/main.py
+import argparse
+import json
 import os
-from crew import ResearchCrew
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from limits import GOVERNOR
+from runs import run_output_dir
+from telemetry import METRICS_PORT, REGISTRY, serve_metrics
 
 # Create output directory if it doesn't exist
 os.makedirs('output', exist_ok=True)
 
-def run():
+# Per-process state for batch workers, built once by _init_worker
+_worker_llm = None
+_worker_parallel = False
+_worker_compact = False
+_worker_resume = False
+_worker_retrieval = False
+
+
+def run(company: str = 'Apple', parallel: bool = False, llm_instance=None, stream: bool = False,
+        compact: bool = False, resume: bool = False, retrieval: bool = False):
     """
-    Run the research crew. 
+    Run the research crew.
     """
+    # crew and llm pull in crewai, so they are imported where a run starts and
+    # --help or a bad argument returns without paying for it
+    from crew import ResearchCrew
+    from llm import CachedLLM, HedgedLLM, RouterLLM, find_wrapper
+
     inputs = {
-        'company': 'Apple'
+        'company': company,
+        'current_date': datetime.now().strftime("%Y-%m-%d"),
     }
 
-    # Create and run the crew
-    result = ResearchCrew().crew().kickoff(inputs=inputs)
+    # Create and run the crew in its own output directory
+    output_dir = run_output_dir(company)
+    research_crew = ResearchCrew(
+        llm_instance=llm_instance,
+        parallel=parallel,
+        output_dir=output_dir,
+        stream_report=stream,
+        on_report_chunk=lambda chunk: print(chunk, end="", flush=True),
+        compact_context=compact,
+        resume=resume,
+        retrieval=retrieval,
+    )
+    try:
+        result = research_crew.crew().kickoff(inputs=inputs)
+    finally:
+        research_crew.write_metrics()
+
+    # Print the result (already shown token by token when streaming, unless restored)
+    checkpoints = research_crew.checkpoints.stats()
+    if not stream or 'finalize_report' in checkpoints['restored']:
+        print("\n\n=== FINAL REPORT ===\n\n")
+        print(result.raw)
+
+    search = research_crew.search_tool.stats()
+    scrape = research_crew.scrape_tool.stats()
+    print(f"\n\nSearch cache: {search['hits']} hits, {search['misses']} misses")
+    print(f"Scrape cache: {scrape['fresh']} fresh, {scrape['not_modified']} not modified, "
+          f"{scrape['deduplicated']} deduplicated, {scrape['downloaded']} downloaded, {scrape['failed']} failed")
+    router = find_wrapper(llm_instance, RouterLLM)
+    if router:
+        routes = ", ".join(f"{name} → {model}" for name, model in router.describe().items())
+        print(f"Model routing: {routes or 'no usable routes'}")
+    cached = find_wrapper(llm_instance, CachedLLM)
+    if cached:
+        llm = cached.stats()
+        print(f"LLM cache: {llm['hits']} hits, {llm['misses']} misses ({llm['hit_rate']:.0%} hit rate)")
+    hedged = find_wrapper(research_crew.llm_instance, HedgedLLM)
+    if hedged:
+        hedge = hedged.stats()
+        print(f"Hedging: {hedge['hedged']} of {hedge['calls']} calls hedged after {hedge['threshold_seconds']}s, "
+              f"{hedge['hedge_wins']} won by the hedge, {hedge['saved_seconds']}s saved")
+    ratios = research_crew.ratio_engine.stats()
+    print(f"Financial ratios: {ratios['ratios']} computed from {ratios['line_items']} reported figures "
+          f"over {ratios['periods']} periods")
+    if research_crew.research_index is not None:
+        corpus = research_crew.research_index.stats()
+        print(f"Research corpus: {corpus['chunks']} passages from {corpus['sources']} sources, "
+              f"{corpus['searches']} queries")
+    queued = {name: limits for name, limits in GOVERNOR.stats().items() if limits['waited']}
+    if queued:
+        waits = ", ".join(f"{name} {limits['wait_seconds']}s over {limits['waited']} requests"
+                          for name, limits in queued.items())
+        print(f"Rate limits: queued {waits}")
+    if checkpoints['restored']:
+        print(f"Checkpoints: {len(checkpoints['restored'])} tasks restored, {len(checkpoints['computed'])} run")
+    if research_crew.compactor:
+        print(f"Context compaction: ~{research_crew.compactor.stats()['tokens_saved']} prompt tokens saved")
+    print(f"Report has been saved to {output_dir}/report.md (metrics in {output_dir}/metrics.json)")
+
+
+def read_companies(source: str) -> List[str]:
+    """Read one company or ticker per line from a file, or from stdin when source is '-'"""
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source) as f:
+            lines = f.read().splitlines()
+
+    companies = []
+    for line in lines:
+        name = line.split('#', 1)[0].strip()
+        if name and name not in companies:
+            companies.append(name)
+    return companies
+
+
+def hedge_api_key(hedge: Optional[str]) -> Optional[str]:
+    """API key of the hedge model's provider from the environment"""
+    provider = (hedge or '').partition('/')[0]
+    return os.getenv(f"{provider.upper()}_API_KEY") if provider and provider != 'ollama' else None
+
+
+def _init_worker(provider: str, model: str, api_key: Optional[str], parallel: bool, llm_cache: bool,
+                 compact: bool = False, resume: bool = False, retrieval: bool = False,
+                 routing: Optional[str] = None, hedge: Optional[str] = None, workers: int = 1):
+    """Build the LLM once per worker process so kickoffs only pay for crew construction"""
+    global _worker_llm, _worker_parallel, _worker_compact, _worker_resume, _worker_retrieval
+    from llm import create_llm, create_routed_llm, load_routes
+
+    # Workers share the provider limits between them
+    GOVERNOR.share(workers)
+
+    _worker_llm = create_llm(provider=provider, model=model, api_key=api_key, cache=llm_cache,
+                             hedge=hedge, hedge_api_key=hedge_api_key(hedge))
+    if routing:
+        _worker_llm = create_routed_llm(_worker_llm, load_routes(routing), {provider: api_key}, cache=llm_cache)
+    _worker_parallel = parallel
+    _worker_compact = compact
+    _worker_resume = resume
+    _worker_retrieval = retrieval
+
+
+def research_company(company: str) -> Tuple[str, bool, float, str, str]:
+    """Run a single kickoff inside a batch worker and report its outcome"""
+    from crew import ResearchCrew
+
+    start = time.monotonic()
+    inputs = {
+        'company': company,
+        'current_date': datetime.now().strftime("%Y-%m-%d"),
+    }
+    output_dir = run_output_dir(company)
+    try:
+        research_crew = ResearchCrew(
+            llm_instance=_worker_llm,
+            parallel=_worker_parallel,
+            output_dir=output_dir,
+            compact_context=_worker_compact,
+            resume=_worker_resume,
+            retrieval=_worker_retrieval,
+            priority='batch',
+        )
+        try:
+            research_crew.crew().kickoff(inputs=inputs)
+        finally:
+            research_crew.write_metrics()
+        return company, True, time.monotonic() - start, output_dir, ""
+    except Exception as e:
+        return company, False, time.monotonic() - start, output_dir, str(e)
+
+
+def batch(
+    companies: List[str],
+    workers: int,
+    provider: str,
+    model: str,
+    api_key: Optional[str] = None,
+    parallel: bool = False,
+    llm_cache: bool = False,
+    summary_path: Optional[str] = None,
+    compact: bool = False,
+    metrics_port: int = 0,
+    resume: bool = False,
+    retrieval: bool = False,
+    routing: Optional[str] = None,
+    hedge: Optional[str] = None,
+) -> int:
+    """
+    Research many companies in a process pool.
+    Returns 0 when every company succeeded and 1 otherwise.
+    With a metrics_port, /metrics aggregates the metrics.json of every finished company.
+    """
+    results = []
+    started = time.monotonic()
+    if serve_metrics(metrics_port):
+        print(f"Serving metrics at http://localhost:{metrics_port}/metrics")
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(provider, model, api_key, parallel, llm_cache, compact, resume, retrieval, routing, hedge,
+                  workers),
+    ) as executor:
+        futures = [executor.submit(research_company, company) for company in companies]
+        for future in as_completed(futures):
+            company, ok, elapsed, output_dir, error = future.result()
+            metrics_path = os.path.join(output_dir, 'metrics.json')
+            if os.path.exists(metrics_path):
+                with open(metrics_path) as f:
+                    REGISTRY.observe_run(json.load(f))
+            results.append({
+                'company': company,
+                'ok': ok,
+                'seconds': round(elapsed, 1),
+                'output_dir': output_dir,
+                'error': error,
+            })
+            status = "OK" if ok else f"FAILED ({error})"
+            print(f"[{len(results)}/{len(companies)}] {company}: {status} in {elapsed:.1f}s", flush=True)
+
+    failed = [r for r in results if not r['ok']]
+
+    print("\n\n=== BATCH SUMMARY ===\n")
+    for r in sorted(results, key=lambda r: r['company']):
+        print(f"{'ok' if r['ok'] else 'FAIL':<5} {r['company']:<30} {r['seconds']:>8.1f}s  {r['output_dir']}")
+    print(f"\n{len(results) - len(failed)} succeeded, {len(failed)} failed "
+          f"in {time.monotonic() - started:.1f}s with {workers} workers")
+
+    if summary_path:
+        with open(summary_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Run financial research from the command line")
+    parser.add_argument('--company', default='Apple', help="Company to research in single-run mode")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="File with one company or ticker per line ('-' reads stdin)")
+    parser.add_argument('--workers', type=int, default=2, help="Worker processes for --batch")
+    parser.add_argument('--provider', default='ollama', choices=['ollama', 'openai', 'anthropic', 'groq'])
+    parser.add_argument('--model', default='llama3.1:8b')
+    parser.add_argument('--parallel-tasks', action='store_true',
+                        help="Run independent tasks of each crew concurrently")
+    parser.add_argument('--llm-cache', action='store_true',
+                        help="Run at temperature 0 and reuse cached LLM responses")
+    parser.add_argument('--compact-context', action='store_true',
+                        help="Condense each task's output to a token budget before passing it on")
+    parser.add_argument('--resume', action='store_true',
+                        help="Restore tasks whose inputs match a checkpoint of an earlier run instead of rerunning them")
+    parser.add_argument('--retrieval', action='store_true',
+                        help="Index searched and scraped pages and let agents query passages instead of whole pages")
+    parser.add_argument('--routing', nargs='?', const='config/routing.yaml', metavar='FILE',
+                        help="Run tasks and agents on the models listed in a routing file "
+                             "(default file: config/routing.yaml)")
+    parser.add_argument('--hedge', metavar='PROVIDER/MODEL',
+                        help="Duplicate unusually slow LLM calls to this model and use the first answer")
+    parser.add_argument('--stream', action='store_true',
+                        help="Print the final report token by token as it is written")
+    parser.add_argument('--summary', metavar='FILE', help="Write batch results as JSON")
+    parser.add_argument('--metrics-port', type=int, default=METRICS_PORT, metavar='PORT',
+                        help="Serve Prometheus metrics of the batch at :PORT/metrics")
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv(f"{args.provider.upper()}_API_KEY") if args.provider != 'ollama' else None
+
+    if not args.batch:
+        from llm import create_llm, create_routed_llm, load_routes
+
+        llm_instance = create_llm(args.provider, args.model, api_key=api_key, cache=args.llm_cache,
+                                  hedge=args.hedge, hedge_api_key=hedge_api_key(args.hedge))
+        if args.routing:
+            llm_instance = create_routed_llm(
+                llm_instance, load_routes(args.routing), {args.provider: api_key}, cache=args.llm_cache
+            )
+        run(company=args.company, parallel=args.parallel_tasks, llm_instance=llm_instance, stream=args.stream,
+            compact=args.compact_context, resume=args.resume, retrieval=args.retrieval)
+        return 0
+
+    companies = read_companies(args.batch)
+    if not companies:
+        print("No companies to research", file=sys.stderr)
+        return 1
 
-    # Print the result
-    print("\n\n=== FINAL REPORT ===\n\n")
-    print(result.raw)
+    return batch(
+        companies,
+        workers=max(1, args.workers),
+        provider=args.provider,
+        model=args.model,
+        api_key=api_key,
+        parallel=args.parallel_tasks,
+        llm_cache=args.llm_cache,
+        summary_path=args.summary,
+        compact=args.compact_context,
+        metrics_port=args.metrics_port,
+        resume=args.resume,
+        retrieval=args.retrieval,
+        routing=args.routing,
+        hedge=args.hedge,
+    )
 
-    print("\n\nReport has been saved to output/report.md")
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    sys.exit(main())
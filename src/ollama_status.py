@@ -0,0 +1,66 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import requests
+
+OLLAMA_URL = "http://localhost:11434"
+
+
+@dataclass(frozen=True)
+class OllamaStatus:
+    """Result of one /api/tags probe"""
+    connected: bool
+    models: List[str] = field(default_factory=list)
+    checked_at: float = field(default_factory=time.time)
+
+
+def probe_ollama(base_url: str = OLLAMA_URL, timeout: float = 3.0) -> OllamaStatus:
+    """Check the connection and list the installed models with a single request"""
+    try:
+        response = requests.get(f"{base_url}/api/tags", timeout=timeout)
+        if response.status_code != 200:
+            return OllamaStatus(connected=False)
+        models = [model["name"] for model in response.json().get("models", [])]
+        return OllamaStatus(connected=True, models=models)
+    except (requests.exceptions.RequestException, ValueError):
+        return OllamaStatus(connected=False)
+
+
+class OllamaMonitor:
+    """Serves the latest OllamaStatus without blocking the caller
+
+    Only the very first call waits for a probe. After that, a status older
+    than ttl is returned as is while a background thread refreshes it, so at
+    most one probe is in flight no matter how many sessions ask.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_URL, ttl: float = 10.0):
+        self.base_url = base_url
+        self.ttl = ttl
+        self._status: Optional[OllamaStatus] = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def status(self) -> OllamaStatus:
+        with self._lock:
+            current = self._status
+            stale = current is None or time.time() - current.checked_at > self.ttl
+            start_refresh = stale and current is not None and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+
+        if current is None:
+            return self.refresh()
+        if start_refresh:
+            threading.Thread(target=self.refresh, daemon=True, name="ollama-probe").start()
+        return current
+
+    def refresh(self) -> OllamaStatus:
+        """Probe now and store the result"""
+        status = probe_ollama(self.base_url)
+        with self._lock:
+            self._status = status
+            self._refreshing = False
+        return status
@@ -0,0 +1,397 @@
+import csv
+import os
+import threading
+import time
+import warnings
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Type
+
+import numpy as np
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from cache import DiskCache, shared_cache
+from financials import COLUMNS, FinancialStatements, RatioTable, format_value, statement_matrix, unit_factor
+
+# Optional universe of fundamentals, one company per row (relative to src/):
+# ticker,name,sector,<metric>... with ratios as fractions (0.25 = 25%) and
+# revenue in millions. Companies researched here are added from their runs.
+PEERS_FILE = os.getenv("PEERS_FILE", "config/peers.csv")
+
+# Fundamentals recorded from research runs
+PEER_TTL = float(os.getenv("PEER_TTL", 180 * 24 * 60 * 60))
+PEER_MAX_ENTRIES = int(os.getenv("PEER_MAX_ENTRIES", 20000))
+
+# How long a comparison of the run's own company waits for its ratios, which
+# are still being extracted when market analysis runs in parallel mode
+PEER_WAIT_SECONDS = float(os.getenv("PEER_WAIT_SECONDS", 300))
+
+# metric -> (label, format); "%" is a fraction shown as a percentage, "x" a
+# multiple and "m" an amount in millions
+PEER_METRICS: Dict[str, tuple] = {
+    "revenue": ("Revenue (millions)", "m"),
+    "revenue_growth": ("Revenue growth", "%"),
+    "gross_margin": ("Gross margin", "%"),
+    "operating_margin": ("Operating margin", "%"),
+    "net_margin": ("Net margin", "%"),
+    "free_cash_flow_margin": ("Free cash flow margin", "%"),
+    "return_on_equity": ("Return on equity", "%"),
+    "debt_to_equity": ("Debt to equity", "x"),
+    "current_ratio": ("Current ratio", "x"),
+}
+METRICS: tuple = tuple(PEER_METRICS)
+
+# Currency of every revenue figure in the universe, including the peers file;
+# researched companies reporting in another currency are ranked without revenue
+PEER_CURRENCY = os.getenv("PEER_CURRENCY", "USD").upper()
+
+# Currency symbols and names the extraction may use instead of ISO codes
+CURRENCY_ALIASES = {"$": "USD", "US$": "USD", "DOLLAR": "USD", "DOLLARS": "USD", "€": "EUR", "EURO": "EUR",
+                    "EUROS": "EUR", "£": "GBP", "¥": "JPY", "YEN": "JPY"}
+
+UNCLASSIFIED = "Unclassified"
+
+
+# Legal-form words dropped from the end of company names, so "Apple Inc." and
+# "Apple" are the same company
+LEGAL_SUFFIXES = {"inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "plc",
+                  "llc", "ag", "sa", "se", "nv", "holdings", "group"}
+
+
+def normalize_name(name: str) -> str:
+    """Case-, punctuation-, whitespace- and legal-form-insensitive company key"""
+    words = "".join(c if c.isalnum() else " " for c in name.lower()).split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+@dataclass
+class PeerStats:
+    """Per-company ranks and per-sector medians of every metric
+
+    Arrays are companies x METRICS; NaN where a company lacks the metric.
+    """
+    percentiles: np.ndarray
+    zscores: np.ndarray
+    medians: np.ndarray
+    counts: np.ndarray
+    sectors: List[str]
+    sector_codes: np.ndarray
+    sector_medians: np.ndarray
+    sector_counts: np.ndarray
+
+
+def compute_peer_stats(values: np.ndarray, sectors: np.ndarray) -> PeerStats:
+    """Percentile ranks, z-scores and overall and sector medians in one pass over the matrix
+
+    A percentile is the share of companies with a lower value, counting ties
+    as half, among those that report the metric. Sorting, mean and standard
+    deviation run over all metrics at once; percentiles take one vectorized
+    binary search per metric and sector medians one reduction per sector.
+    """
+    rows, columns = values.shape
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+
+    ordered = np.sort(values, axis=0)  # NaN sorts last
+    percentiles = np.full(values.shape, np.nan)
+    for j in range(columns):
+        reported = ordered[:counts[j], j]
+        below = np.searchsorted(reported, values[:, j], side="left")
+        up_to = np.searchsorted(reported, values[:, j], side="right")
+        percentiles[:, j] = np.where(valid[:, j], (below + up_to) * 50.0 / max(counts[j], 1), np.nan)
+
+    with warnings.catch_warnings():
+        # All-NaN columns and sectors are expected and stay NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0)
+        zscores = np.full(values.shape, np.nan)
+        np.divide(values - mean, std, out=zscores, where=valid & (std > 0))
+        medians = np.nanmedian(values, axis=0) if rows else np.full(columns, np.nan)
+
+        names, codes = np.unique(sectors, return_inverse=True) if rows else (np.array([]), np.array([], int))
+        order = np.argsort(codes, kind="stable")
+        groups = np.split(values[order], np.flatnonzero(np.diff(codes[order])) + 1) if rows else []
+        sector_medians = (
+            np.vstack([np.nanmedian(group, axis=0) for group in groups])
+            if groups else np.empty((0, columns))
+        )
+    sector_counts = np.bincount(codes, minlength=len(names))
+
+    return PeerStats(
+        percentiles=percentiles,
+        zscores=zscores,
+        medians=medians,
+        counts=counts,
+        sectors=[str(name) for name in names],
+        sector_codes=codes,
+        sector_medians=sector_medians,
+        sector_counts=sector_counts,
+    )
+
+
+class PeerMatrix:
+    """Fundamentals of many companies as one column-major float matrix
+
+    Each metric is a contiguous column, so statistics over all companies are
+    single vectorized reductions. stats() is computed once per matrix.
+    """
+
+    def __init__(self, tickers: Sequence[str], names: Sequence[str], sectors: Sequence[str],
+                 values: np.ndarray):
+        self.tickers = list(tickers)
+        self.names = list(names)
+        self.sectors = np.array([sector or UNCLASSIFIED for sector in sectors], dtype=object)
+        self.values = np.asfortranarray(values, dtype=np.float64).reshape(len(self.names), len(METRICS))
+        self._rows: Dict[str, int] = {}
+        for row, (ticker, name) in enumerate(zip(self.tickers, self.names)):
+            self._rows[normalize_name(name)] = row
+            if ticker:
+                self._rows.setdefault(normalize_name(ticker), row)
+        self._stats: Optional[PeerStats] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "PeerMatrix":
+        """Matrix of dicts with name, optional ticker and sector, and metric values
+
+        A later record replaces an earlier one that shares its name or ticker,
+        keeping the earlier ticker and sector where it has none.
+        """
+        rows: List[Dict[str, Any]] = []
+        aliases: Dict[str, int] = {}
+        for record in records:
+            keys = [normalize_name(key) for key in (record.get("ticker"), record["name"]) if key]
+            row = next((aliases[key] for key in keys if key in aliases), None)
+            if row is None:
+                row = len(rows)
+                rows.append(record)
+            else:
+                previous = rows[row]
+                rows[row] = {
+                    **record,
+                    "ticker": record.get("ticker") or previous.get("ticker"),
+                    "sector": record.get("sector") or previous.get("sector"),
+                }
+            for key in keys + [normalize_name(rows[row].get("ticker") or "")]:
+                if key:
+                    aliases[key] = row
+        values = np.array(
+            [[_number(record.get(metric)) for metric in METRICS] for record in rows], dtype=np.float64
+        )
+        return cls(
+            [record.get("ticker") or "" for record in rows],
+            [record["name"] for record in rows],
+            [record.get("sector") or "" for record in rows],
+            values,
+        )
+
+    def find(self, company: str) -> Optional[int]:
+        """Row of a company by name or ticker"""
+        return self._rows.get(normalize_name(company))
+
+    def stats(self) -> PeerStats:
+        with self._lock:
+            if self._stats is None:
+                self._stats = compute_peer_stats(self.values, self.sectors)
+            return self._stats
+
+
+def _number(value: Any) -> float:
+    if value is None or value == "":
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def read_peers_file(path: str) -> List[Dict[str, Any]]:
+    """Records of a peers CSV, or none when the file does not exist"""
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as f:
+        return [row for row in csv.DictReader(f) if row.get("name") or row.get("ticker")]
+
+
+def unit_scale(unit: str) -> Optional[float]:
+    """Factor from a unit such as "USD millions" or "bn" to millions, None if not recognized
+
+    Revenue in an unrecognized unit is left out rather than ranked at the wrong scale.
+    """
+    factor = unit_factor(unit)
+    return factor / 1e6 if factor is not None else None
+
+
+def normalize_currency(currency: str) -> str:
+    """ISO code of a currency as extracted, e.g. USD for "$" or "usd"""
+    code = currency.strip().upper()
+    return CURRENCY_ALIASES.get(code, code)
+
+
+def peer_metrics(statements: FinancialStatements, table: RatioTable) -> Dict[str, float]:
+    """PEER_METRICS of the latest period with a figure, from a run's extracted statements
+
+    Revenue is only included in millions of PEER_CURRENCY.
+    """
+    ratios = table.as_dict()
+    latest = {}
+    for metric, (label, _) in PEER_METRICS.items():
+        series = ratios.get(label, {})
+        known = [value for value in series.values() if value is not None]
+        if known:
+            latest[metric] = known[-1]
+
+    scale = unit_scale(statements.unit)
+    if scale is None or normalize_currency(statements.currency) != PEER_CURRENCY:
+        return latest
+    _, matrix = statement_matrix(statements)
+    revenues = matrix[:, COLUMNS.index("revenue")]
+    revenues = revenues[~np.isnan(revenues)]
+    if len(revenues):
+        latest["revenue"] = float(revenues[-1]) * scale
+    return latest
+
+
+class PeerUniverse:
+    """Every company with fundamentals: the peers file plus companies researched here
+
+    matrix() is rebuilt only after the file changes or a company is recorded.
+    """
+
+    def __init__(self, path: str = PEERS_FILE, store: Optional[DiskCache] = None):
+        self.path = path
+        self.store = store
+        self._matrix: Optional[PeerMatrix] = None
+        self._file_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _store(self) -> DiskCache:
+        if self.store is None:
+            self.store = shared_cache("peers", PEER_TTL, PEER_MAX_ENTRIES)
+        return self.store
+
+    def record(self, name: str, sector: Optional[str], metrics: Dict[str, float]) -> None:
+        """Add or update a researched company"""
+        self._store().set(
+            normalize_name(name),
+            {"name": name, "sector": sector or "", "recorded_at": time.time(), **metrics},
+        )
+        with self._lock:
+            self._matrix = None
+
+    def record_run(self, company: str, statements: FinancialStatements, table: RatioTable) -> None:
+        """Add the company of a research run with its latest extracted figures"""
+        metrics = peer_metrics(statements, table)
+        if metrics:
+            self.record(company, statements.sector, metrics)
+
+    def has_peers(self, company: str) -> bool:
+        """Whether any company other than this one has fundamentals"""
+        matrix = self.matrix()
+        return len(matrix) > (1 if matrix.find(company) is not None else 0)
+
+    def matrix(self) -> PeerMatrix:
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        with self._lock:
+            if self._matrix is None or mtime != self._file_mtime:
+                # Researched companies come last and replace file rows of the same name
+                records = read_peers_file(self.path) + self._store().values()
+                self._matrix = PeerMatrix.from_records(records)
+                self._file_mtime = mtime
+            return self._matrix
+
+
+_universe: Optional[PeerUniverse] = None
+_universe_lock = threading.Lock()
+
+
+def shared_universe() -> PeerUniverse:
+    """Process-wide PeerUniverse over PEERS_FILE and CACHE_DIR/peers.sqlite"""
+    global _universe
+    with _universe_lock:
+        if _universe is None:
+            _universe = PeerUniverse()
+        return _universe
+
+
+def _zscore(value: float) -> str:
+    return "n/a" if np.isnan(value) else f"{value:+.1f}"
+
+
+def compare(matrix: PeerMatrix, company: str, peers: Sequence[str] = (), max_peers: int = 8) -> str:
+    """Markdown comparison of a company with the universe, its sector and named peers"""
+    row = matrix.find(company)
+    if row is None:
+        return (
+            f"No fundamentals for {company} among the {len(matrix)} companies with data. "
+            "Compare it using the figures in the research instead."
+        )
+    stats = matrix.stats()
+    code = stats.sector_codes[row]
+    sector = stats.sectors[code]
+    lines = [
+        f"{matrix.names[row]} against {len(matrix)} companies ({stats.sector_counts[code]} in {sector}). "
+        "Percentile 100 is the highest value.",
+        "",
+        f"| Metric | {matrix.names[row]} | Percentile | z-score | {sector} median | All median |",
+        "|---|---|---|---|---|---|",
+    ]
+    for j, (label, fmt) in enumerate(PEER_METRICS.values()):
+        value = matrix.values[row, j]
+        if np.isnan(value):
+            continue
+        lines.append(
+            f"| {label} | {format_value(value, fmt)} | {stats.percentiles[row, j]:.0f} | {_zscore(stats.zscores[row, j])} "
+            f"| {format_value(stats.sector_medians[code, j], fmt)} | {format_value(stats.medians[j], fmt)} |"
+        )
+
+    found = [matrix.find(peer) for peer in peers]
+    rows = [r for r in dict.fromkeys(found) if r is not None and r != row][:max_peers]
+    missing = [peer for peer, r in zip(peers, found) if r is None]
+    if rows:
+        header = [label for label, _ in PEER_METRICS.values()]
+        lines += ["", "| Company | Sector | " + " | ".join(header) + " |", "|---|---|" + "---|" * len(header)]
+        for r in [row] + rows:
+            cells = [format_value(value, fmt) for value, (_, fmt) in zip(matrix.values[r], PEER_METRICS.values())]
+            lines.append(f"| {matrix.names[r]} | {matrix.sectors[r]} | " + " | ".join(cells) + " |")
+    if missing:
+        lines += ["", f"No fundamentals for: {', '.join(missing)}."]
+    return "\n".join(lines)
+
+
+class PeerComparisonSchema(BaseModel):
+    """Input for PeerComparisonTool"""
+    company: str = Field(..., description="Company name or ticker to compare")
+    peers: str = Field("", description="Optional comma-separated competitor names or tickers to list alongside")
+
+
+class PeerComparisonTool(BaseTool):
+    """Ranks a company's fundamentals against every company with data"""
+    name: str = "Compare with peers"
+    description: str = (
+        "Compares a company's revenue, growth, margins, returns and leverage with every company "
+        "that has fundamentals: percentile rank, z-score, sector median and overall median per "
+        "metric, plus the figures of named competitors. Use it for the competitive comparison "
+        "instead of recalling competitors' figures."
+    )
+    args_schema: Type[BaseModel] = PeerComparisonSchema
+    universe: Any = Field(default=None, exclude=True)
+    ratio_engine: Any = Field(default=None, exclude=True)
+    company: str = ""
+    wait_seconds: float = PEER_WAIT_SECONDS
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, company: str, peers: str = "", **kwargs: Any) -> str:
+        # The run's own company enters the universe once its ratios are computed
+        if self.ratio_engine is not None and normalize_name(company) == normalize_name(self.company):
+            self.ratio_engine.wait(self.wait_seconds)
+        universe = self.universe or shared_universe()
+        names = [peer.strip() for peer in peers.split(",") if peer.strip()]
+        return compare(universe.matrix(), company, names)
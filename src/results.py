@@ -0,0 +1,81 @@
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+# Parsed artifacts kept in memory; a few runs' worth of task outputs
+RESULTS_CACHE_SIZE = int(os.getenv("RESULTS_CACHE_SIZE", 64))
+
+HEADING = re.compile(r"^(#{1,6})\s+(.+?)(?:\s+#+)?\s*$")
+FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+@dataclass(frozen=True)
+class Section:
+    """One markdown heading and the text up to the next heading"""
+    title: str
+    level: int
+    body: str
+
+    @property
+    def markdown(self) -> str:
+        """The section as markdown again, heading included"""
+        if not self.title:
+            return self.body
+        heading = f"{'#' * self.level} {self.title}"
+        return f"{heading}\n\n{self.body}" if self.body else heading
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A task output file as read from disk, with its markdown sections"""
+    path: str
+    text: str
+    sections: Tuple[Section, ...]
+    mtime_ns: int
+    size: int
+
+
+def parse_sections(text: str) -> Tuple[Section, ...]:
+    """Split markdown into sections at ATX headings outside code fences
+
+    Text before the first heading becomes a section with an empty title.
+    """
+    sections = []
+    title, level, lines = "", 0, []
+    in_fence = False
+    for line in text.splitlines():
+        if FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING.match(line)
+        if match:
+            if title or any(l.strip() for l in lines):
+                sections.append(Section(title, level, "\n".join(lines).strip()))
+            title, level, lines = match.group(2), len(match.group(1)), []
+        else:
+            lines.append(line)
+    if title or any(l.strip() for l in lines):
+        sections.append(Section(title, level, "\n".join(lines).strip()))
+    return tuple(sections)
+
+
+@lru_cache(maxsize=RESULTS_CACHE_SIZE)
+def _read_artifact(path: str, mtime_ns: int, size: int) -> Artifact:
+    text = Path(path).read_text()
+    return Artifact(path, text, parse_sections(text), mtime_ns, size)
+
+
+def load_artifact(path: Union[str, Path]) -> Optional[Artifact]:
+    """Read and parse an output file, or reuse the copy read before
+
+    Entries are keyed on path, modification time and size, so a file that a
+    running crew rewrites is read again while unchanged files cost one stat().
+    Returns None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return _read_artifact(str(path), stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,202 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+# Hashing vectorizer width; a power of two so a bit mask picks the bucket
+EMBEDDING_DIM = int(os.getenv("RETRIEVAL_EMBEDDING_DIM", 2048))
+
+# Chunks of about a paragraph, overlapping so a fact split by a chunk border is
+# still found whole in one of them
+CHUNK_WORDS = int(os.getenv("RETRIEVAL_CHUNK_WORDS", 120))
+CHUNK_OVERLAP = int(os.getenv("RETRIEVAL_CHUNK_OVERLAP", 30))
+
+# Passages returned per query, and the page text a scrape returns once the
+# page is indexed
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 5))
+SCRAPE_PREVIEW_CHARS = int(os.getenv("RETRIEVAL_PREVIEW_CHARS", 1500))
+
+TOKEN = re.compile(r"[a-z0-9$€£%]+(?:[.,'][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or that the their "
+    "this to was were which will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords; figures like 3.5% stay whole"""
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class HashingEmbedder:
+    """Embeds text as signed hashed counts of its words and word pairs
+
+    Needs no model download and gives the same vector in every process. Term
+    counts are damped (1 + log tf) and rows are L2-normalized, so a dot
+    product is the cosine similarity.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        if dim & (dim - 1):
+            raise ValueError(f"Embedding dimension must be a power of two, got {dim}")
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """One normalized float32 row per text"""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if not features:
+                continue
+            hashes = np.fromiter(
+                (zlib.crc32(feature.encode("utf-8")) for feature in features),
+                dtype=np.uint32,
+                count=len(features),
+            )
+            buckets = (hashes & (self.dim - 1)).astype(np.intp)
+            signs = np.where(hashes >> 31, -1.0, 1.0)
+            vectors[row] = np.bincount(buckets, weights=signs, minlength=self.dim)
+        np.copysign(np.log1p(np.abs(vectors)), vectors, out=vectors)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+def chunk_text(text: str, words: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Split text into windows of about `words` words, consecutive ones overlapping"""
+    tokens = text.split()
+    if len(tokens) <= words:
+        return [" ".join(tokens)] if tokens else []
+    step = max(words - overlap, 1)
+    return [" ".join(tokens[start:start + words]) for start in range(0, len(tokens) - overlap, step)]
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """One passage of an indexed document"""
+    source: str
+    position: int
+    text: str
+
+
+class VectorIndex:
+    """In-memory index of document chunks with top-k cosine search
+
+    Vectors live in one NumPy matrix that grows by doubling, so a search is a
+    single matrix-vector product. Chunks already indexed, from any source, are
+    skipped. Safe to share between the concurrent tasks of a run.
+    """
+
+    def __init__(self, embedder: Optional[Any] = None, chunk_words: int = CHUNK_WORDS,
+                 chunk_overlap: int = CHUNK_OVERLAP):
+        self.embedder = embedder or HashingEmbedder()
+        self.chunk_words = chunk_words
+        self.chunk_overlap = chunk_overlap
+        self.chunks: List[Chunk] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._seen: set = set()
+        self._sources: set = set()
+        self._searches = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def add(self, source: str, text: str) -> int:
+        """Chunk, embed and store a document; returns the number of new chunks"""
+        new = []
+        with self._lock:
+            for position, passage in enumerate(chunk_text(text, self.chunk_words, self.chunk_overlap)):
+                digest = hashlib.sha1(passage.encode("utf-8")).digest()
+                if digest not in self._seen:
+                    self._seen.add(digest)
+                    new.append(Chunk(source, position, passage))
+        if not new:
+            return 0
+
+        vectors = self.embedder.embed([chunk.text for chunk in new])
+        with self._lock:
+            size = len(self.chunks)
+            if size + len(new) > len(self._vectors):
+                grown = np.zeros((max(2 * len(self._vectors), size + len(new), 64), vectors.shape[1]),
+                                 dtype=np.float32)
+                if size:
+                    grown[:size] = self._vectors[:size]
+                self._vectors = grown
+            self._vectors[size:size + len(new)] = vectors
+            self.chunks.extend(new)
+            self._sources.add(source)
+        return len(new)
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K) -> List[Tuple[Chunk, float]]:
+        """The k chunks most similar to the query, best first"""
+        query_vector = self.embedder.embed([query])[0]
+        with self._lock:
+            self._searches += 1
+            size = len(self.chunks)
+            if not size or k <= 0:
+                return []
+            scores = self._vectors[:size] @ query_vector
+            chunks = self.chunks[:size]
+        if size > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(chunks[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def stats(self) -> Dict[str, int]:
+        """Documents, chunks and searches served"""
+        with self._lock:
+            return {"sources": len(self._sources), "chunks": len(self.chunks), "searches": self._searches}
+
+
+def index_search_results(index: VectorIndex, query: str, result: Any) -> int:
+    """Add search results to the index, one document per organic result if structured"""
+    organic = result.get("organic") if isinstance(result, dict) else None
+    if not organic:
+        return index.add(f"search: {query}", str(result))
+    added = 0
+    for item in organic:
+        text = " ".join(str(item.get(key, "")) for key in ("title", "snippet"))
+        added += index.add(item.get("link") or f"search: {query}", text)
+    return added
+
+
+class CorpusQuerySchema(BaseModel):
+    """Input for ResearchCorpusTool"""
+    query: str = Field(..., description="What to look for, e.g. 'Q3 revenue growth' or 'main competitors'")
+
+
+class ResearchCorpusTool(BaseTool):
+    """Passage search over everything searched and scraped during the run"""
+    name: str = "Query research corpus"
+    description: str = (
+        "Finds the passages most relevant to a query in the web pages and search results "
+        "collected so far in this research run, with their source URLs. Use it to look up "
+        "specific facts and figures instead of reading whole pages again."
+    )
+    args_schema: Type[BaseModel] = CorpusQuerySchema
+    index: Any = Field(default=None, exclude=True)
+    top_k: int = RETRIEVAL_TOP_K
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, query: str, **kwargs: Any) -> str:
+        hits = self.index.search(query, self.top_k) if self.index is not None else []
+        if not hits:
+            return "No matching passages in the research corpus yet. Search or read websites first."
+        return "\n\n".join(
+            f"[{number}] {chunk.source} (relevance {score:.2f})\n{chunk.text}"
+            for number, (chunk, score) in enumerate(hits, start=1)
+        )
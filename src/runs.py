@@ -0,0 +1,38 @@
+import os
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+# Every kickoff writes into output/<company>/<run_id>/ so concurrent runs never
+# share files. Paths stay relative: CrewAI rejects ".." and strips a leading "/"
+# from Task.output_file.
+OUTPUT_ROOT = "output"
+
+
+def slugify(company: str) -> str:
+    """Turn a company name or ticker into a filesystem-safe directory name"""
+    slug = re.sub(r"[^a-z0-9]+", "-", company.strip().lower()).strip("-")
+    return slug or "company"
+
+
+def new_run_id() -> str:
+    """Sortable, collision-resistant run identifier"""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def run_output_dir(company: str, run_id: Optional[str] = None) -> str:
+    """Create and return the output directory for one research run"""
+    path = f"{OUTPUT_ROOT}/{slugify(company)}/{run_id or new_run_id()}"
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def latest_run_dir(company: str) -> Optional[str]:
+    """Most recent run directory for a company, if any"""
+    company_dir = Path(OUTPUT_ROOT) / slugify(company)
+    if not company_dir.is_dir():
+        return None
+    runs = sorted(p.name for p in company_dir.iterdir() if p.is_dir())
+    return f"{OUTPUT_ROOT}/{slugify(company)}/{runs[-1]}" if runs else None
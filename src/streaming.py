@@ -0,0 +1,74 @@
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from crewai.events import LLMStreamChunkEvent, crewai_event_bus
+
+# Streaming LLM calls emit one LLMStreamChunkEvent per token batch, tagged
+# with the id of the task that made the call. A single bus handler routes the
+# chunks to whichever ReportStream registered that task.
+FINAL_ANSWER = "Final Answer:"
+
+_streams: Dict[str, "ReportStream"] = {}
+_streams_lock = threading.Lock()
+_handler_registered = False
+
+
+class ReportStream:
+    """Collects streamed tokens of one task and mirrors them into its output file
+
+    The agent's preamble ("Thought: ...") is dropped once the final answer
+    starts, so both the file and text show only the report itself.
+    """
+
+    def __init__(self, path: str, on_chunk: Optional[Callable[[str], None]] = None):
+        self.path = Path(path)
+        self.on_chunk = on_chunk
+        self._raw = ""
+        self._written = ""
+        self._lock = threading.Lock()
+
+    @property
+    def text(self) -> str:
+        """Report text streamed so far"""
+        raw = self._raw
+        if FINAL_ANSWER in raw:
+            return raw.rsplit(FINAL_ANSWER, 1)[1].lstrip()
+        return raw
+
+    def feed(self, chunk: str) -> None:
+        """Append a chunk and bring the output file up to date"""
+        with self._lock:
+            self._raw += chunk
+            text = self.text
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self._written and text.startswith(self._written):
+                with self.path.open("a") as f:
+                    f.write(text[len(self._written):])
+            else:
+                self.path.write_text(text)
+            self._written = text
+        if self.on_chunk:
+            self.on_chunk(chunk)
+
+
+def _on_stream_chunk(source, event: LLMStreamChunkEvent) -> None:
+    stream = _streams.get(event.task_id or "")
+    if stream is not None and event.chunk:
+        stream.feed(event.chunk)
+
+
+def stream_task(task, stream: ReportStream) -> None:
+    """Route streamed tokens of a task's LLM calls into the given stream"""
+    global _handler_registered
+    with _streams_lock:
+        if not _handler_registered:
+            crewai_event_bus.on(LLMStreamChunkEvent)(_on_stream_chunk)
+            _handler_registered = True
+        _streams[str(task.id)] = stream
+
+
+def stop_streaming(task) -> None:
+    """Forget the stream registered for a task"""
+    with _streams_lock:
+        _streams.pop(str(task.id), None)
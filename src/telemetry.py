@@ -0,0 +1,334 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Port of the optional Prometheus /metrics endpoint; 0 leaves it off
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+
+# Tool events arrive on the global crewai event bus; one handler routes them to
+# the RunMetrics that watches the emitting task
+_watched: Dict[str, "RunMetrics"] = {}
+_watched_lock = threading.Lock()
+_handlers_registered = False
+
+
+def _bucket() -> Dict[str, Any]:
+    return {
+        "llm_calls": 0,
+        "llm_seconds": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "llm_errors": 0,
+        "tool_calls": 0,
+        "tool_seconds": 0.0,
+        "tool_errors": 0,
+    }
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class RunMetrics:
+    """Wall time, LLM calls, tokens and tool calls of one crew run
+
+    Counts are kept per task and per agent, LLM counts also per model. LLM calls are reported by
+    llm.MeteredLLM, tool calls by the crewai tool events of the watched tasks,
+    and task wall times are read from the tasks when the run finishes.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._tasks: Dict[str, Dict[str, Any]] = defaultdict(_bucket)
+        self._agents: Dict[str, Dict[str, Any]] = defaultdict(_bucket)
+        self._models: Dict[str, Dict[str, Any]] = defaultdict(_bucket)
+        self._tools: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"calls": 0, "errors": 0, "cached": 0, "latencies": []}
+        )
+        self._task_info: Dict[str, Dict[str, Any]] = {}
+        self._task_ids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def record_llm_call(
+        self,
+        task: Optional[str],
+        agent: Optional[str],
+        seconds: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        failed: bool = False,
+        model: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            buckets = self._buckets(task, agent)
+            if model:
+                buckets.append(self._models[model])
+            for bucket in buckets:
+                bucket["llm_calls"] += 1
+                bucket["llm_seconds"] += seconds
+                bucket["prompt_tokens"] += prompt_tokens
+                bucket["completion_tokens"] += completion_tokens
+                bucket["llm_errors"] += int(failed)
+
+    def record_tool_call(
+        self,
+        task: Optional[str],
+        agent: Optional[str],
+        tool: str,
+        seconds: float,
+        failed: bool = False,
+        from_cache: bool = False,
+    ) -> None:
+        with self._lock:
+            for bucket in self._buckets(task, agent):
+                bucket["tool_calls"] += 1
+                bucket["tool_seconds"] += seconds
+                bucket["tool_errors"] += int(failed)
+            stats = self._tools[tool]
+            stats["calls"] += 1
+            stats["errors"] += int(failed)
+            stats["cached"] += int(from_cache)
+            if not failed:
+                stats["latencies"].append(seconds)
+
+    def _buckets(self, task: Optional[str], agent: Optional[str]) -> List[Dict[str, Any]]:
+        return [self._tasks[task or "unknown"], self._agents[(agent or "unknown").strip()]]
+
+    def watch(self, tasks: Iterable[Any]) -> None:
+        """Collect the tool events emitted while these tasks run"""
+        _register_handlers()
+        with _watched_lock:
+            for task in tasks:
+                self._task_ids[str(task.id)] = task.name
+                _watched[str(task.id)] = self
+
+    def finish(self, tasks: Iterable[Any]) -> None:
+        """Record wall time and outcome of each task and stop watching them"""
+        with _watched_lock:
+            for task_id in self._task_ids:
+                _watched.pop(task_id, None)
+        with self._lock:
+            for task in tasks:
+                if task.start_time and task.end_time:
+                    seconds = (task.end_time - task.start_time).total_seconds()
+                else:
+                    seconds = 0.0
+                if getattr(task, "restored", False):
+                    status = "restored"
+                elif task.output is not None:
+                    status = "complete"
+                elif task.start_time:
+                    status = "failed"
+                else:
+                    status = "skipped"
+                self._task_info[task.name] = {
+                    "agent": task.agent.role.strip() if task.agent else "",
+                    "status": status,
+                    "wall_seconds": round(seconds, 3),
+                }
+            self.finished_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Metrics as JSON-serializable data, see metrics.json in the run directory"""
+        with self._lock:
+            tasks = {}
+            for name in list(self._task_info) + [n for n in self._tasks if n not in self._task_info]:
+                counts = self._tasks.get(name) or _bucket()
+                tasks[name] = {**self._task_info.get(name, {}), **_rounded(counts)}
+                tasks[name]["retries"] = counts["llm_errors"] + counts["tool_errors"]
+
+            agents = {}
+            for role, counts in self._agents.items():
+                agents[role] = _rounded(counts)
+                agents[role]["wall_seconds"] = round(sum(
+                    info["wall_seconds"] for info in self._task_info.values() if info["agent"] == role
+                ), 3)
+                agents[role]["retries"] = counts["llm_errors"] + counts["tool_errors"]
+
+            tools = {
+                name: {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "cached": stats["cached"],
+                    "total_seconds": round(sum(stats["latencies"]), 3),
+                    "p50_seconds": round(_percentile(stats["latencies"], 0.5), 3),
+                    "p95_seconds": round(_percentile(stats["latencies"], 0.95), 3),
+                    "max_seconds": round(max(stats["latencies"], default=0.0), 3),
+                }
+                for name, stats in self._tools.items()
+            }
+            models = {
+                name: {key: value for key, value in _rounded(counts).items() if not key.startswith("tool_")}
+                for name, counts in self._models.items()
+            }
+            finished_at = self.finished_at or time.time()
+
+        return {
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wall_seconds": round(finished_at - self.started_at, 3),
+            "tasks": tasks,
+            "agents": agents,
+            "tools": tools,
+            "models": models,
+        }
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def _rounded(counts: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in counts.items()}
+
+
+def _on_tool_finished(source, event) -> None:
+    metrics = _watched.get(event.task_id or "")
+    if metrics is not None:
+        seconds = (event.finished_at - event.started_at).total_seconds()
+        metrics.record_tool_call(
+            metrics._task_ids.get(event.task_id), event.agent_role, event.tool_name,
+            seconds, from_cache=event.from_cache,
+        )
+
+
+def _on_tool_error(source, event) -> None:
+    metrics = _watched.get(event.task_id or "")
+    if metrics is not None:
+        metrics.record_tool_call(
+            metrics._task_ids.get(event.task_id), event.agent_role, event.tool_name, 0.0, failed=True,
+        )
+
+
+def _register_handlers() -> None:
+    global _handlers_registered
+    with _watched_lock:
+        if _handlers_registered:
+            return
+        from crewai.events import ToolUsageErrorEvent, ToolUsageFinishedEvent, crewai_event_bus
+
+        crewai_event_bus.on(ToolUsageFinishedEvent)(_on_tool_finished)
+        crewai_event_bus.on(ToolUsageErrorEvent)(_on_tool_error)
+        _handlers_registered = True
+
+
+# name -> (type, help) of every exported series
+PROMETHEUS_METRICS: Dict[str, Tuple[str, str]] = {
+    "research_runs_total": ("counter", "Finished research runs"),
+    "research_run_seconds_total": ("counter", "Wall time of finished research runs"),
+    "research_tasks_total": ("counter", "Finished tasks by outcome"),
+    "research_task_seconds_total": ("counter", "Wall time spent in each task"),
+    "research_llm_calls_total": ("counter", "LLM calls"),
+    "research_llm_seconds_total": ("counter", "Time spent waiting for LLM calls"),
+    "research_llm_errors_total": ("counter", "Failed LLM calls"),
+    "research_llm_prompt_tokens_total": ("counter", "Prompt tokens sent"),
+    "research_llm_completion_tokens_total": ("counter", "Completion tokens received"),
+    "research_llm_hedged_calls_total": ("counter", "Slow LLM calls duplicated to the hedge model"),
+    "research_llm_hedge_wins_total": ("counter", "Hedged LLM calls answered first by the hedge model"),
+    "research_llm_hedge_saved_seconds_total": ("counter", "Latency saved by hedge wins"),
+    "research_limiter_acquired_total": ("counter", "LLM and tool requests let through by the limiter"),
+    "research_limiter_wait_seconds_total": ("counter", "Time requests spent queued in the limiter"),
+    "research_jobs_coalesced_total": ("counter", "Research requests served by an identical queued, running or recent run"),
+    "research_tool_calls_total": ("counter", "Tool calls"),
+    "research_tool_seconds_total": ("counter", "Time spent in tool calls"),
+    "research_tool_errors_total": ("counter", "Failed tool calls"),
+}
+
+
+class MetricsRegistry:
+    """Process-wide counters fed by finished runs, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        with self._lock:
+            self._values[(name, tuple(sorted(labels.items())))] += value
+
+    def observe_run(self, summary: Dict[str, Any]) -> None:
+        """Add the metrics of a finished run (RunMetrics.to_dict()) to the counters"""
+        failed = any(task.get("status") == "failed" for task in summary["tasks"].values())
+        self.inc("research_runs_total", status="failed" if failed else "complete")
+        self.inc("research_run_seconds_total", summary["wall_seconds"])
+
+        for name, task in summary["tasks"].items():
+            labels = {"task": name, "agent": task.get("agent", "")}
+            if "status" in task:
+                self.inc("research_tasks_total", task=name, status=task["status"])
+                self.inc("research_task_seconds_total", task["wall_seconds"], **labels)
+            self.inc("research_llm_calls_total", task["llm_calls"], **labels)
+            self.inc("research_llm_seconds_total", task["llm_seconds"], **labels)
+            self.inc("research_llm_errors_total", task["llm_errors"], **labels)
+            self.inc("research_llm_prompt_tokens_total", task["prompt_tokens"], **labels)
+            self.inc("research_llm_completion_tokens_total", task["completion_tokens"], **labels)
+
+        for name, tool in summary["tools"].items():
+            self.inc("research_tool_calls_total", tool["calls"], tool=name)
+            self.inc("research_tool_seconds_total", tool["total_seconds"], tool=name)
+            self.inc("research_tool_errors_total", tool["errors"], tool=name)
+
+    def render(self) -> str:
+        with self._lock:
+            values = dict(self._values)
+        lines = []
+        for name, (kind, help_text) in PROMETHEUS_METRICS.items():
+            series = [(labels, value) for (metric, labels), value in values.items() if metric == name]
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series):
+                label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels)
+                lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port: int = METRICS_PORT, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve REGISTRY at http://host:port/metrics from a daemon thread
+
+    Only one server is started per process; later calls return it. Returns
+    None when port is 0.
+    """
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True, name="metrics").start()
+        return _server
@@ -0,0 +1,210 @@
+import hashlib
+import os
+import re
+import time
+from typing import Any, Dict, Optional, Tuple, Type
+
+import requests
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr
+
+from cache import DiskCache, PageCache, hash_key, shared_cache, shared_page_cache
+from limits import GOVERNOR
+from retrieval import SCRAPE_PREVIEW_CHARS, VectorIndex, index_search_results
+
+# Search results for the same company rarely change within a day
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", 24 * 60 * 60))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 5000))
+
+# Scraped pages younger than this are served without any request; older ones
+# are revalidated with a conditional GET
+SCRAPE_CACHE_FRESH_SECONDS = float(os.getenv("SCRAPE_CACHE_FRESH_SECONDS", 60 * 60))
+
+# Pages not fetched or revalidated for this long are dropped, and the least
+# recently used ones beyond the cap are evicted
+SCRAPE_CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", 7 * 24 * 60 * 60))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", 5000))
+
+# Same browser-like headers as crewai_tools.ScrapeWebsiteTool
+SCRAPE_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Referer": "https://www.google.com/",
+}
+
+# One keep-alive session for every scrape in the process
+_session = requests.Session()
+_session.headers.update(SCRAPE_HEADERS)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query"""
+    return " ".join(query.lower().split())
+
+
+class SearchToolSchema(BaseModel):
+    """Input for CachedSearchTool"""
+    search_query: str = Field(..., description="Mandatory search query you want to use to search the internet")
+
+
+class CachedSearchTool(BaseTool):
+    """Web search with a persistent TTL cache in front of the search backend
+
+    The backend is anything with a run(search_query=...) method, SerperDevTool
+    by default, so a fake backend can stand in for tests and benchmarks. With
+    an index, every result is also added to it for ResearchCorpusTool.
+    Backend requests queue for the "serper" limiter at the tool's priority.
+    """
+    name: str = "Search the internet with Serper"
+    description: str = (
+        "A tool that can be used to search the internet with a search_query. "
+        "Repeated queries are answered from a local cache."
+    )
+    args_schema: Type[BaseModel] = SearchToolSchema
+    backend: Any = Field(default=None, exclude=True)
+    cache: Optional[DiskCache] = Field(default=None, exclude=True)
+    index: Optional[VectorIndex] = Field(default=None, exclude=True)
+    priority: Any = "interactive"  # name or limits.SharedPriority
+
+    _hits: int = PrivateAttr(default=0)
+    _misses: int = PrivateAttr(default=0)
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, search_query: str, **kwargs: Any) -> Any:
+        result = self._search(search_query)
+        if self.index is not None:
+            index_search_results(self.index, search_query, result)
+        return result
+
+    def _search(self, search_query: str) -> Any:
+        if self.cache is None:
+            self.cache = shared_cache("search", SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES)
+        if self.backend is None:
+            from crewai_tools import SerperDevTool
+            self.backend = SerperDevTool()
+
+        key = hash_key("search", normalize_query(search_query))
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._hits += 1
+            return cached
+
+        self._misses += 1
+        with GOVERNOR.limiter("serper").slot(self.priority):
+            result = self.backend.run(search_query=search_query)
+        self.cache.set(key, result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Cache hits and misses served by this tool instance"""
+        return {"hits": self._hits, "misses": self._misses}
+
+
+def extract_text(html: str) -> str:
+    """Visible page text, formatted the way ScrapeWebsiteTool returns it"""
+    from bs4 import BeautifulSoup
+
+    text = "The following text is scraped website content:\n\n"
+    text += BeautifulSoup(html, "html.parser").get_text(" ")
+    text = re.sub("[ \t]+", " ", text)
+    return re.sub("\\s+\n\\s+", "\n", text)
+
+
+class ScrapeToolSchema(BaseModel):
+    """Input for CachedScrapeTool"""
+    website_url: str = Field(..., description="Mandatory website url to read the file")
+
+
+class CachedScrapeTool(BaseTool):
+    """Website reader backed by a content-addressed page cache
+
+    Recently fetched pages are served from the cache. Older ones are
+    revalidated with If-None-Match / If-Modified-Since, and a changed URL whose
+    body hashes to text already seen skips HTML parsing entirely.
+
+    With an index, the page is added to it and only its opening is returned,
+    leaving the rest to be looked up through ResearchCorpusTool.
+    Requests queue for the "scrape" limiter at the tool's priority. Error
+    responses (4xx/5xx) return a short error message instead of the error
+    page, and are neither cached nor indexed.
+    """
+    name: str = "Read website content"
+    description: str = "A tool that can be used to read a website content."
+    args_schema: Type[BaseModel] = ScrapeToolSchema
+    cache: Optional[PageCache] = Field(default=None, exclude=True)
+    index: Optional[VectorIndex] = Field(default=None, exclude=True)
+    fresh_seconds: float = SCRAPE_CACHE_FRESH_SECONDS
+    preview_chars: int = SCRAPE_PREVIEW_CHARS
+    priority: Any = "interactive"  # name or limits.SharedPriority
+
+    _counts: Dict[str, int] = PrivateAttr(
+        default_factory=lambda: {"fresh": 0, "not_modified": 0, "deduplicated": 0, "downloaded": 0, "failed": 0}
+    )
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _run(self, website_url: str, **kwargs: Any) -> str:
+        text, ok = self._fetch(website_url)
+        if self.index is None or not ok:
+            return text
+
+        chunks = self.index.add(website_url, text)
+        if len(text) <= self.preview_chars:
+            return text
+        return (
+            f"{text[:self.preview_chars].rstrip()}...\n\n"
+            f"[Showing the first {self.preview_chars} of {len(text)} characters. The page was added "
+            f"to the research corpus ({chunks} new passages); use the \"Query research corpus\" tool "
+            f"to find specific facts in it.]"
+        )
+
+    def _fetch(self, website_url: str) -> Tuple[str, bool]:
+        """Text of a page and True, or an error message and False for error responses"""
+        if self.cache is None:
+            self.cache = shared_page_cache(SCRAPE_CACHE_TTL, SCRAPE_CACHE_MAX_ENTRIES)
+
+        cached = self.cache.get(website_url)
+        if cached and time.time() - cached["fetched_at"] < self.fresh_seconds:
+            self._counts["fresh"] += 1
+            return cached["text"], True
+
+        headers = {}
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        with GOVERNOR.limiter("scrape").slot(self.priority):
+            response = _session.get(website_url, timeout=15, headers=headers)
+        if cached and response.status_code == 304:
+            self.cache.touch(website_url)
+            self._counts["not_modified"] += 1
+            return cached["text"], True
+        if not response.ok:
+            # Error pages are neither page content nor worth caching or indexing
+            self._counts["failed"] += 1
+            return f"Could not read {website_url}: HTTP {response.status_code} {response.reason}", False
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        text = self.cache.text_for_hash(content_hash)
+        if text is not None:
+            self._counts["deduplicated"] += 1
+        else:
+            response.encoding = response.apparent_encoding
+            text = extract_text(response.text)
+            self._counts["downloaded"] += 1
+
+        self.cache.put(
+            website_url,
+            content_hash,
+            text,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return text, True
+
+    def stats(self) -> Dict[str, int]:
+        """How this tool instance answered its scrapes"""
+        return dict(self._counts)